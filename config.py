@@ -31,3 +31,17 @@ path_mapping = getenv('PATH_MAPPING', None)
 
 # Connection String
 connection_string = getenv('CONN_STR', None)
+
+# Crawl Journal (resumable crawls)
+journal_path = getenv('JOURNAL_PATH', 'crawl_journal.db')
+max_file_attempts = int(getenv('MAX_FILE_ATTEMPTS', 3))
+
+# Parquet Export Directory (Clean tables export, optional)
+parquet_export_path = getenv('PARQUET_EXPORT_PATH', None)
+
+# Files md5 Hash Prefetching (concurrency limit, and bytes in flight budget)
+hash_prefetch_workers = int(getenv('HASH_PREFETCH_WORKERS', 4))
+hash_prefetch_bytes = int(getenv('HASH_PREFETCH_BYTES', 2**28))
+
+# Reporting each sheet's data frame memory usage before/after its dtypes compaction
+report_memory_usage = getenv('REPORT_MEMORY_USAGE', 'False').lower() == 'true'
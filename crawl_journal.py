@@ -0,0 +1,114 @@
+import sqlite3
+import time
+
+from typing import Optional
+
+"""
+This module represents a durable work journal of the crawl. Every file's progress (discovered, parsed, written and
+views-updated) is committed to a small SQLite DB as soon as it happens, so a crawl which was stopped (crashed, killed,
+or timed out) is resumed from where it stopped - completed files are skipped, and files which were already written to
+the DB only have their view tables updated. Every step of a file (parsing, writing, and updating the view tables) is
+recorded as an attempt when it starts, which is released once the step completes - so only the files which were actually
+in progress are charged when the process crashes (and not the ones waiting in the pipeline's queues). A file whose steps
+were started too many times without completing (e.g. it keeps crashing the process) is quarantined, until it's modified.
+
+Functions:
+
+__init__() -- Callable within calling creating a class's attribute
+__enter__() -- Executed when entering the scope after creating a class attribute
+__exit__() -- Executed after exiting the scope in which the class's attribute was created
+_connect() -- Opens a connection with the journal DB, and creates the journal table (if it doesn't exist)
+_disconnect() -- Closes the connection with the journal DB
+_clear_completed() -- Deletes the completed files from the journal (once they're saved in the files cache)
+_fetch_file() -- Fetches the file's journal state and attempts (None if it's not in the journal with the same md5)
+resume_state() -- Returns the file's journal state (None if it's a new file, or if it was modified since)
+is_quarantined() -- Checks whether the file was started too many times without completing
+start() -- Records an attempt at the file's next step (the file is in progress), and returns the state to resume it from
+mark() -- Records the file's new state (its step has completed, so the step's attempt is released)
+"""
+
+
+CRAWL_JOURNAL_TABLE = 'Crawl_Journal'
+
+
+class CrawlJournal:
+    DISCOVERED = 'discovered'
+    PARSED = 'parsed'
+    WRITTEN = 'written'
+    VIEWS_UPDATED = 'views_updated'
+
+    journal_path: str
+    max_attempts: int
+    conn: Optional[sqlite3.Connection]
+
+    def __init__(self, journal_path: str, max_attempts: int = 3) -> None:
+        self.journal_path = journal_path
+        self.max_attempts = max_attempts
+        self.conn = None
+
+    def __enter__(self):
+        self._connect()
+
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:  # The crawl has completed, and the files cache has been saved
+            self._clear_completed()
+        self._disconnect()
+
+    def _connect(self) -> None:
+        self.conn = sqlite3.connect(self.journal_path)
+        # Each state transition is a small committed transaction, which survives a crash of the process
+        self.conn.execute('PRAGMA journal_mode=WAL;')
+        self.conn.execute(f'CREATE TABLE IF NOT EXISTS {CRAWL_JOURNAL_TABLE} ('
+                          f'File_path TEXT PRIMARY KEY, '
+                          f'File_md5 TEXT NOT NULL, '
+                          f'State TEXT NOT NULL, '
+                          f'Attempts INTEGER NOT NULL, '
+                          f'Updated_at REAL NOT NULL);')
+        self.conn.commit()
+
+    def _disconnect(self) -> None:
+        if self.conn:
+            self.conn.close()
+            self.conn = None
+
+    def _clear_completed(self) -> None:
+        with self.conn:
+            self.conn.execute(f'DELETE FROM {CRAWL_JOURNAL_TABLE} WHERE State = ?;', (self.VIEWS_UPDATED,))
+
+    def _fetch_file(self, file_path: str, file_md5: str) -> Optional[tuple]:
+        file_row = self.conn.execute(f'SELECT State, Attempts FROM {CRAWL_JOURNAL_TABLE} '
+                                     f'WHERE File_path = ? AND File_md5 = ?;', (file_path, file_md5)).fetchone()
+        return file_row
+
+    def resume_state(self, file_path: str, file_md5: str) -> Optional[str]:
+        file_row = self._fetch_file(file_path, file_md5)
+
+        return file_row[0] if file_row else None
+
+    def is_quarantined(self, file_path: str, file_md5: str) -> bool:
+        file_row = self._fetch_file(file_path, file_md5)
+
+        return bool(file_row) and file_row[0] != self.VIEWS_UPDATED and file_row[1] >= self.max_attempts
+
+    def start(self, file_path: str, file_md5: str) -> str:
+        # A file (with the same md5) is resumed from its recorded state. A modified file starts over (and its attempts
+        # are reset)
+        with self.conn:
+            self.conn.execute(f'INSERT INTO {CRAWL_JOURNAL_TABLE} (File_path, File_md5, State, Attempts, Updated_at) '
+                              f'VALUES (?, ?, ?, 1, ?) '
+                              f'ON CONFLICT(File_path) DO UPDATE SET '
+                              f'State = CASE WHEN File_md5 = excluded.File_md5 THEN State ELSE excluded.State END, '
+                              f'Attempts = CASE WHEN File_md5 = excluded.File_md5 THEN Attempts + 1 ELSE 1 END, '
+                              f'File_md5 = excluded.File_md5, '
+                              f'Updated_at = excluded.Updated_at;',
+                              (file_path, file_md5, self.DISCOVERED, time.time()))
+
+        return self.resume_state(file_path, file_md5)
+
+    def mark(self, file_path: str, state: str) -> None:
+        with self.conn:
+            self.conn.execute(f'UPDATE {CRAWL_JOURNAL_TABLE} SET State = ?, Attempts = MAX(Attempts - 1, 0), '
+                              f'Updated_at = ? WHERE File_path = ?;',
+                              (state, time.time(), file_path))
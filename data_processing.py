@@ -2,7 +2,7 @@ import numpy as np
 import pandas as pd
 
 from typing import List, Dict, Optional
-from utils import replacing_string_char
+from utils import normalize_column_name, csv_table_name
 
 """
 This module does all the pre-processing necessary and choosable (applying filters) on the data.
@@ -11,9 +11,15 @@ Functions:
 
 _func() -- Handling 'nan' values and peak values in the data frame
 _wrong_data_filtering() -- Filters the wrong data within the data frame (if exists)
+_row_fingerprints() -- Calculates a stable hash (fingerprint) for each row in the data frame
 _removing_duplicates() -- Removing any duplicated rows within the data frame
 _interpolated_data() -- Replacing 'nan' values with the desired interpolation
 data_filtering() -- If choosable, applying different filter on the data
+_compacting_column() -- Converts a column into its most compact dtype (without changing its values)
+compact_data_frames() -- Converts the data frames columns into compact dtypes (optionally reporting their memory
+                          before/after)
+_expanding_data_frame() -- Converts a compacted data frame back into the DB tables representation - numeric columns as
+                           float64, and the other ones as object columns ('nan' cells as np.nan)
 _non_integer_type_columns() -- Picking the non integer type columns from the data frame
 _create_clean_data_frame() -- Creates a clean data frame (manipulates fields names and 'nan' values)
 _pandas_to_numeric() -- Changing the columns value type to numeric (for filtering ready)
@@ -27,6 +33,10 @@ create_data_frames() -- Creates a pandas data frame from the provided file
 """
 
 
+# A text column is turned into a category if its unique values are at most this ratio of its (non 'nan') cells
+CATEGORY_MAX_UNIQUE_RATIO = 0.5
+
+
 def _func(value: Optional[float]) -> Optional[float]:
     if value is ' ':  # Turning a ' ' (space) char into 'nan' (so afterwards it could be aggregated)
         return pd.to_numeric(value, errors='coerce')
@@ -43,9 +53,29 @@ def _wrong_data_filtering(data_frame: pd.DataFrame) -> pd.DataFrame:
     return data_frame
 
 
+def _row_fingerprints(data_frame: pd.DataFrame) -> pd.Series:
+    # A stable hash per row, which doesn't depend on the columns order nor on all-null columns (so a row keeps its
+    # fingerprint when a table gains new columns). Numeric cells are normalized to float first ('1' and 1.0 are alike).
+    # Every non-null cell is hashed together with its column name, and the cells hashes are summed (mod 2^64)
+    row_hashes = np.zeros(len(data_frame), dtype=np.uint64)
+    for column in data_frame.columns:
+        series: pd.Series = data_frame[column]
+        numeric_series = pd.to_numeric(series, errors='coerce')
+        is_numeric = numeric_series.notna()
+        cells = series.astype(str)
+        cells[is_numeric] = numeric_series[is_numeric].astype(float).map(repr)
+        cells = f'{column}\x1f' + cells
+
+        # A new array (the hashes array might be read-only under copy-on-write)
+        cells_hashes = pd.util.hash_pandas_object(cells, index=False).to_numpy()
+        row_hashes += np.where(series.isna().to_numpy(), np.uint64(0), cells_hashes)
+
+    return pd.Series(row_hashes, index=data_frame.index).map('{:016x}'.format)
+
+
 def _removing_duplicates(data_frame: pd.DataFrame) -> pd.DataFrame:
-    # Removing Duplicates
-    data_frame.drop_duplicates(inplace=True)
+    # Removing Duplicates (rows with the same fingerprint)
+    data_frame = data_frame[~_row_fingerprints(data_frame).duplicated()].copy()
 
     return data_frame
 
@@ -75,6 +105,73 @@ def data_filtering(data_frame_list: List[pd.DataFrame]) -> List[pd.DataFrame]:
     return data_frame_list
 
 
+def _compacting_column(series: pd.Series) -> pd.Series:
+    non_nan_series = series.dropna()
+    if not len(non_nan_series):
+        return series
+
+    # Numeric column - only if all of its (non 'nan') cells are numeric, so no cell value is lost
+    if pd.api.types.is_numeric_dtype(series):
+        numeric_series = series
+    elif series.dtype == object:
+        numeric_series = pd.to_numeric(series.map(lambda value: value.strip() if isinstance(value, str) else value),
+                                       errors='coerce')
+        if numeric_series.isna().sum() != series.isna().sum():
+            numeric_series = None
+    else:  # Already compacted
+        return series
+
+    if numeric_series is not None:
+        non_nan_numeric_series = numeric_series.dropna()
+        if (non_nan_numeric_series % 1 == 0).all():  # Integers - the smallest nullable integer type which fits
+            for integer_type in ('Int8', 'Int16', 'Int32', 'Int64'):
+                type_info = np.iinfo(integer_type.lower())
+                if type_info.min <= non_nan_numeric_series.min() and non_nan_numeric_series.max() <= type_info.max:
+                    return numeric_series.astype(integer_type)
+        # Floats stay float64 (a float32 would change the stored values)
+        return numeric_series.astype('float64')
+
+    # Text column - a category if it's of low cardinality, otherwise a nullable string (if all cells are strings)
+    if non_nan_series.nunique() <= len(non_nan_series) * CATEGORY_MAX_UNIQUE_RATIO:
+        return series.astype('category')
+    if non_nan_series.map(lambda value: isinstance(value, str)).all():
+        return series.astype('string')
+
+    return series
+
+
+def compact_data_frames(data_frame_list: List[pd.DataFrame], file_name_list: List[str],
+                        report_memory: bool = False) -> List[pd.DataFrame]:
+    for list_index, (data_frame, file_name) in enumerate(zip(data_frame_list, file_name_list)):
+        if not len(data_frame.columns):
+            continue
+
+        memory_before = data_frame.memory_usage(deep=True).sum() if report_memory else None
+        data_frame = pd.concat([_compacting_column(data_frame.iloc[:, i]) for i in range(len(data_frame.columns))],
+                               axis=1)
+        if report_memory:
+            memory_after = data_frame.memory_usage(deep=True).sum()
+            print(f'{file_name}: {memory_before / 2**20:.2f} MB -> {memory_after / 2**20:.2f} MB')
+        data_frame_list[list_index] = data_frame
+
+    return data_frame_list
+
+
+def _expanding_data_frame(data_frame: pd.DataFrame) -> pd.DataFrame:
+    expanded_columns_list: List[pd.Series] = []
+    for i in range(len(data_frame.columns)):
+        series = data_frame.iloc[:, i]
+        if pd.api.types.is_numeric_dtype(series):  # Numeric columns stay numeric (their cells are stored as floats)
+            expanded_columns_list.append(series.astype('float64'))
+        else:
+            expanded_columns_list.append(series.astype(object).where(series.notna(), np.nan))
+
+    if not expanded_columns_list:
+        return data_frame.copy()
+
+    return pd.concat(expanded_columns_list, axis=1)
+
+
 def _non_integer_type_columns(concatenated_table: pd.DataFrame) -> (List, List):
     # Picking the non-integer type columns
     numeric_columns_list, non_numeric_columns_list = [], []
@@ -94,30 +191,23 @@ def _non_integer_type_columns(concatenated_table: pd.DataFrame) -> (List, List):
 def _create_clean_data_frame(data_frame: pd.DataFrame) -> pd.DataFrame:
     # Create clean DataFrame
     drop_clean_set: set = {'-', '_', '/', '\\'}
-    clean_data_frame = data_frame.copy()
-    for column in clean_data_frame.keys():
-        for index, cell in enumerate(clean_data_frame[column]):
-            cell = str(cell)
-            cell = list(cell)
-            cell = [ch for ch in cell if ch not in drop_clean_set]
-
-            # Joining back into string
-            s: str = ''
-            for ch in cell:
-                s += ch
-            cell = s
-            clean_data_frame.loc[index, column] = cell
+    drop_clean_table: Dict = {ord(ch): None for ch in drop_clean_set}
+    # Each cell as a string, without the dropped chars (a numeric column becomes a strings column)
+    clean_data_frame = data_frame.apply(lambda series: series.astype(str).str.translate(drop_clean_table))
 
     clean_data_frame.replace('nan', np.nan, inplace=True)
     return clean_data_frame
 
 
 def _pandas_to_numeric(data_frame: pd.DataFrame) -> pd.DataFrame:
+    # Numeric cells are converted into floats, while the other cells (and the 'nan' ones) are kept as they are
     for col in data_frame.columns:
-        for index, cell in enumerate(data_frame[col]):
-            numeric_value = pd.to_numeric(cell, errors='coerce')
-            if numeric_value > -np.inf:  # Is numeric
-                data_frame.loc[index, col] = float(numeric_value)
+        numeric_series = pd.to_numeric(data_frame[col], errors='coerce')
+        numeric_cells = (numeric_series > -np.inf).to_numpy()  # Is numeric
+        if numeric_cells.any():
+            values = data_frame[col].to_numpy(dtype=object, copy=True)
+            values[numeric_cells] = numeric_series.to_numpy(dtype='float64')[numeric_cells]
+            data_frame[col] = pd.Series(values, index=data_frame.index, dtype=object)
 
     return data_frame
 
@@ -155,29 +245,7 @@ def _changing_column_indexes(data_frame: pd.DataFrame) -> None:
 
 def _changing_column_indexes_names(data_frame: pd.DataFrame) -> None:
     # Replacing '\n' and ' ' with '_' in DataFrame's indexes names
-    columns_list: List = []
-    for column in data_frame.columns:
-        column_name = column[0]
-        column_name = column_name.replace('\n', '_')
-        i = 0
-        while i < len(column_name):
-            if column_name[i] == ' ':
-                if (i != 0) and (i != len(column_name) - 1) and column_name[i+1] != '_' and column_name[i-1] != '_':
-                    # Replacing character column_name[i] with '_'
-                    column_name = replacing_string_char(column_name, i, '_')
-                    continue
-                # Deleting column[i]
-                column_name = replacing_string_char(column_name, i, None)
-            i += 1
-
-        # If the first or last char was '\n', then delete the '_' char which it was replaced with
-        while column_name[0] == '_' or column_name[-1] == '_':
-            if column_name[0] == '_':
-                column_name = replacing_string_char(column_name, 0, None)
-                continue
-            column_name = replacing_string_char(column_name, -1, None)
-
-        columns_list.append(column_name)
+    columns_list: List = [normalize_column_name(column[0]) for column in data_frame.columns]
     data_frame.columns = columns_list
 
 
@@ -206,9 +274,7 @@ def create_data_frames(file: str, pandas_callback_function: callable) -> (List[p
         data_frame_list.append(data_frame)
 
         # Determining SQL table's name
-        file_name_with_extension = file.split('\\')[-1]
-        file_name: str = file_name_with_extension.split('.')[0]
-        file_name_list.append(file_name)
+        file_name_list.append(csv_table_name(file))
 
     else:  # If it's an excel file
         # TODO: Create a function for this - return func(file, pandas_callback_function)
@@ -1,12 +1,13 @@
-import numpy as np
 import pandas as pd
 import config
 
-from sqlalchemy.engine import Engine
-from typing import Optional, List, Dict, Tuple
-from sqlalchemy import NVARCHAR, create_engine
-from data_processing import _pandas_to_numeric, _create_clean_data_frame
-from utils import create_engine_path, FILES_META_DATA_TABLE
+from sqlalchemy.engine import Connection, Engine
+from typing import Optional, List, Dict
+from sqlalchemy import NVARCHAR, create_engine, inspect, text, bindparam
+from data_processing import _pandas_to_numeric, _create_clean_data_frame, _row_fingerprints, _expanding_data_frame
+from parquet_sink import _add_to_parquet
+from translation_index import TranslationIndex
+from utils import create_engine_path, FILES_META_DATA_TABLE, FILES_THROUGHPUT_TABLE, ROW_FINGERPRINT_COLUMN
 
 """
 This module is responsible for the interface with the Database. Fetching, Updating, and Creating different DB Tables and 
@@ -16,18 +17,31 @@ mapping dictionary.
 Functions:
 
 _fetch_table() -- Fetches a required table from DB
-_data_frames_formatting() -- Updates an existing table in DB with a new one. If there's no matching table in DB yet, it
-                             creates a new one
-_add_to_db() -- Adds tables to DB with corresponding type
-update_database() -- Iterate throw each differential data frame and adds it to DB
+_fetch_table_columns() -- Fetches the columns names of a required table from DB (None if it doesn't exist)
+_fetch_next_index() -- Fetches the next SQL 'index' value of a required table from DB
+_fetch_existing_fingerprints() -- Semi-joins rows fingerprints against a table's fingerprint index in DB
+_formatting_raw_table() -- Normalizes a raw data frame, fingerprints its rows and removes duplicated ones
+_formatting_clean_table() -- Creates the clean table of a formatted raw table (with the rows fingerprints)
+_data_frames_formatting() -- Formats the new (not yet existing) rows of each data frame for updating the matching table 
+                             in DB. If there's no matching table in DB yet, it formats all of them for a new one
+_adding_missing_columns() -- Adds a data frame's columns which don't exist yet to an existing table in DB
+_create_fingerprint_index() -- Creates a unique index on a table's fingerprint column in DB
+_add_to_db() -- Adds tables to DB with corresponding type (creates new ones, or appends to existing ones), in a single
+                transaction
+update_database() -- Iterate throw each differential data frame and adds it to DB (and exports its new clean rows to
+                     Parquet files, if an export directory is provided)
+export_data_frames() -- Exports the data frames clean rows to Parquet files, without the DB (when it isn't updated)
 _fetching_sql_file_meta_data_table() -- Fetches the Meta Data Table from the DB. If it doesn't exist, creates an empty 
                                         one with the desired fields
 _create_view_sql_query() -- Creates an SQL View query (for raw and clean view tables)
-_is_relevant_table() -- Checks if the table is relevant for translation/mapping
 _create_sql_view_tables() -- Creates an SQL View Table in the database
 """
 
 
+# Fingerprints per semi-join query (MSSQL limits a query to 2100 parameters)
+FINGERPRINTS_CHUNK_SIZE = 1000
+
+
 def _fetch_table(table_name: str, engine: Engine) -> pd.DataFrame:
     try:  # Check if the table {table_name} already exists
         existing_table: Optional[pd.DataFrame] = pd.read_sql(f'SELECT * FROM [raw].[{table_name}];', engine)
@@ -41,56 +55,171 @@ def _fetch_table(table_name: str, engine: Engine) -> pd.DataFrame:
     return existing_table
 
 
+def _fetch_table_columns(table_name: str, engine: Engine) -> Optional[List[str]]:
+    # Returns the table's columns names, or None if there isn't a table by name {table_name} yet
+    inspector = inspect(engine)
+    if not inspector.has_table(table_name, schema='Raw'):
+        return None
+
+    return [column['name'] for column in inspector.get_columns(table_name, schema='Raw')]
+
+
+def _fetch_next_index(table_name: str, engine: Engine) -> int:
+    with engine.connect() as conn:
+        max_index = conn.execute(f'SELECT MAX([index]) FROM [raw].[{table_name}];').scalar()
+
+    return 0 if max_index is None else int(max_index) + 1
+
+
+def _fetch_existing_fingerprints(fingerprints: pd.Series, table_name: str, engine: Engine) -> set:
+    # Semi-join of the given fingerprints against the table's unique fingerprint index. Only the fingerprints which
+    # already exist in the table are read back, so memory depends on the new rows only (and not on the table's size)
+    query = text(f'SELECT [{ROW_FINGERPRINT_COLUMN}] FROM [raw].[{table_name}] '
+                 f'WHERE [{ROW_FINGERPRINT_COLUMN}] IN :fingerprints;').bindparams(bindparam('fingerprints',
+                                                                                         expanding=True))
+    existing_fingerprints: set = set()
+    unique_fingerprints = fingerprints.unique().tolist()
+    with engine.connect() as conn:
+        for i in range(0, len(unique_fingerprints), FINGERPRINTS_CHUNK_SIZE):
+            chunk = unique_fingerprints[i:i + FINGERPRINTS_CHUNK_SIZE]
+            existing_fingerprints.update(row[0] for row in conn.execute(query, {'fingerprints': chunk}))
+
+    return existing_fingerprints
+
+
+def _formatting_raw_table(data_frame: pd.DataFrame) -> pd.DataFrame:
+    # Compacted data frames are expanded back into the DB tables representation. Numeric columns are float64 already,
+    # so only the object (text) columns have their numeric cells converted
+    raw_table = _expanding_data_frame(data_frame.reset_index(drop=True))
+    object_columns = (raw_table.dtypes == object).to_numpy()
+    if object_columns.any():
+        raw_table.loc[:, object_columns] = _pandas_to_numeric(raw_table.loc[:, object_columns])
+
+    # Fingerprinting each row, and removing the duplicated ones
+    fingerprints = _row_fingerprints(raw_table)
+    raw_table = raw_table[~fingerprints.duplicated()].copy()
+    raw_table[ROW_FINGERPRINT_COLUMN] = fingerprints[raw_table.index]
+    raw_table.reset_index(drop=True, inplace=True)
+
+    return raw_table
+
+
+def _formatting_clean_table(raw_table: pd.DataFrame) -> pd.DataFrame:
+    clean_data_frame = _create_clean_data_frame(raw_table.drop(columns=[ROW_FINGERPRINT_COLUMN]))
+    clean_data_frame[ROW_FINGERPRINT_COLUMN] = raw_table[ROW_FINGERPRINT_COLUMN]
+
+    return clean_data_frame
+
+
 def _data_frames_formatting(data_frame_list: List[pd.DataFrame], table_name_list: List[str], engine: Engine) -> \
-                           (pd.DataFrame, pd.DataFrame, str):
+                           (pd.DataFrame, pd.DataFrame, str, Optional[List[str]]):
 
     for table_name, data_frame in zip(table_name_list, data_frame_list):
 
-        existing_table = _fetch_table(table_name, engine)
+        existing_columns = _fetch_table_columns(table_name, engine)
 
-        # Take table from mssql, concat with data_frame (ignore_index=True), drop duplicates, send again to sql
         """
         IMPORTANT:
-        We're reading the SQL table to the local machine RAM (as Panda's DataFrame), concatenating it (if exists)
-        with the current data_frame, and then sending it back to mssql.
+        Every row in the Raw table carries a fingerprint (a stable hash over its normalized values) with a unique index
+        on it. A new data_frame is deduplicated against that index (a semi-join on the fingerprints), and only its new
+        rows are appended to the table. The existing table is never read into the local machine RAM.
 
-        Another option was to insert the current data_frame as Upserting (Insert-Update) Panda's to SQL command.
-        While it's more practical, faster, reducing usage of memory (RAM), and back_forth process saving. In case
-        there's a current data_frame with different column names than the existing one (Table) in mssql, it wouldn't
-        work! (the insertion command) - SQL doesn't know how to update table's columns.
+        In case the current data_frame has column names which the existing table doesn't, these columns are added to
+        the SQL tables before the insertion (see _add_to_db()).
 
-        For this reason, it was decided to use Panda's 'Concat' command (which required reading the SQL Table,
-        concatenating it locally, and then updating (dropping) the existed one on mssql).
+        Tables which were created before the fingerprints existed are read (once) into RAM, concatenated with the
+        current data_frame, fingerprinted and replaced in SQL - from then on they're handled incrementally.
         """
-        concatenated_table = pd.concat([existing_table, data_frame], ignore_index=True)  # Reordering the rows indexes
-        concatenated_table.replace(0, '0', inplace=True)
-        concatenated_table.fillna('np.nan', inplace=True)
-        concatenated_table = _pandas_to_numeric(concatenated_table)
-        concatenated_table.drop_duplicates(inplace=True, ignore_index=True)
-        concatenated_table.replace('np.nan', np.nan, inplace=True)
+        if existing_columns is not None and ROW_FINGERPRINT_COLUMN not in existing_columns:
+            existing_table = _fetch_table(table_name, engine)
+            raw_table = _formatting_raw_table(pd.concat([existing_table, data_frame], ignore_index=True))
+            existing_columns, next_index = None, 0
+        else:
+            raw_table = _formatting_raw_table(data_frame)
+            next_index = 0
+            if existing_columns is not None:
+                existing_fingerprints = _fetch_existing_fingerprints(raw_table[ROW_FINGERPRINT_COLUMN], table_name,
+                                                                     engine)
+                raw_table = raw_table[~raw_table[ROW_FINGERPRINT_COLUMN].isin(existing_fingerprints)]
+                raw_table = raw_table.reset_index(drop=True)
+                next_index = _fetch_next_index(table_name, engine)
 
         # Create clean DataFrame
-        clean_data_frame = _create_clean_data_frame(concatenated_table)
+        clean_data_frame = _formatting_clean_table(raw_table)
+
+        # Continuing the SQL's 'index' column of the existing table
+        raw_table.index += next_index
+        clean_data_frame.index += next_index
+
+        yield raw_table, clean_data_frame, table_name, existing_columns
+
+
+def _adding_missing_columns(columns: List[str], existing_columns: List[str], table_name: str,
+                            conn: Connection) -> None:
+    missing_columns = [column for column in columns if column not in existing_columns]
+    column_type = NVARCHAR().compile(dialect=conn.dialect)  # NVARCHAR(max) in MSSQL
+    for column in missing_columns:
+        conn.execute(f'ALTER TABLE [raw].[{table_name}] ADD [{column}] {column_type} NULL;')
+        conn.execute(f'ALTER TABLE [clean].[{table_name}] ADD [{column}] {column_type} NULL;')
 
-        yield concatenated_table, clean_data_frame, table_name
 
+def _create_fingerprint_index(table_name: str, conn: Connection) -> None:
+    if conn.dialect.name == 'sqlite':  # SQLite qualifies the index's name by the schema (rather than the table's name)
+        conn.execute(f'CREATE UNIQUE INDEX [raw].[UX_{table_name}_{ROW_FINGERPRINT_COLUMN}] '
+                     f'ON [{table_name}] ([{ROW_FINGERPRINT_COLUMN}]);')
+        return
 
-def _add_to_db(raw_table: pd.DataFrame, clean_table: pd.DataFrame, table_name: str, engine: Engine) -> None:
+    conn.execute(f'CREATE UNIQUE INDEX [UX_{table_name}_{ROW_FINGERPRINT_COLUMN}] '
+                 f'ON [raw].[{table_name}] ([{ROW_FINGERPRINT_COLUMN}]);')
+
+
+def _add_to_db(raw_table: pd.DataFrame, clean_table: pd.DataFrame, table_name: str, engine: Engine,
+               existing_columns: Optional[List[str]] = None) -> None:
     # Changing non-integer columns type (in sql) to NVarChar, and integer ones to NUMERIC
     # (for future interpolation on data)
     nvarchar_dict: Dict = {col_name: NVARCHAR for col_name in raw_table.columns}
+    # A bounded length for the fingerprint column, so it could be indexed
+    nvarchar_dict[ROW_FINGERPRINT_COLUMN] = NVARCHAR(16)
+
+    # A single transaction - if the write is interrupted (a crash or a DB timeout), neither table keeps the new rows.
+    # Otherwise a retry would find them in the Raw table, skip them as existing, and the Clean table would miss them
+    with engine.begin() as conn:
+        if existing_columns is None:  # A new table (or a legacy one which was re-created)
+            raw_table.to_sql(table_name, conn, if_exists='replace', dtype=nvarchar_dict, schema='Raw')
+            clean_table.to_sql(table_name, conn, if_exists='replace', dtype=nvarchar_dict, schema='Clean')
+            _create_fingerprint_index(table_name, conn)
+            return
 
-    raw_table.to_sql(table_name, engine, if_exists='replace', dtype=nvarchar_dict, schema='Raw')
+        _adding_missing_columns(list(raw_table.columns), existing_columns, table_name, conn)
 
-    clean_table.to_sql(table_name, engine, if_exists='replace', dtype=nvarchar_dict, schema='Clean')
+        raw_table.to_sql(table_name, conn, if_exists='append', dtype=nvarchar_dict, schema='Raw')
 
+        clean_table.to_sql(table_name, conn, if_exists='append', dtype=nvarchar_dict, schema='Clean')
 
-def update_database(data_frame_list: List[pd.DataFrame], file_name_list: List[str]) -> None:
+
+def update_database(data_frame_list: List[pd.DataFrame], file_name_list: List[str], source_file: Optional[str] = None,
+                    export_directory: Optional[str] = None, translate_dict: Optional[Dict] = None) -> None:
     engine_path: str = create_engine_path()
     engine = create_engine(engine_path, echo=False)
 
-    for raw_table, clean_table, table_name in _data_frames_formatting(data_frame_list, file_name_list, engine):
-        _add_to_db(raw_table, clean_table, table_name, engine)
+    for raw_table, clean_table, table_name, existing_columns in _data_frames_formatting(data_frame_list,
+                                                                                        file_name_list, engine):
+        if existing_columns is not None and raw_table.empty:  # No new rows
+            continue
+        # Exporting before adding to DB - if the crawl stops in between, the rows would be exported again (they can be
+        # deduplicated by their fingerprint) rather than never be exported
+        if export_directory:
+            _add_to_parquet(clean_table, table_name, source_file or table_name, export_directory, translate_dict)
+        _add_to_db(raw_table, clean_table, table_name, engine, existing_columns)
+
+
+def export_data_frames(data_frame_list: List[pd.DataFrame], file_name_list: List[str], source_file: str,
+                       export_directory: str, translate_dict: Optional[Dict] = None) -> None:
+    # Without the DB there are no existing rows to deduplicate against - all of the file's (deduplicated) clean rows
+    # are exported, and consumers deduplicate them by their fingerprint
+    for table_name, data_frame in zip(file_name_list, data_frame_list):
+        clean_table = _formatting_clean_table(_formatting_raw_table(data_frame))
+        _add_to_parquet(clean_table, table_name, source_file, export_directory, translate_dict)
 
 
 def _fetching_sql_file_meta_data_table(connection):
@@ -113,22 +242,21 @@ def _fetching_sql_file_meta_data_table(connection):
 
 
 def _create_view_sql_query(view_table_name: str, translate_dict: Dict, table_name: str,
-                           sql_columns_names: Optional[List[Tuple]]) -> (str, str):
+                           sql_columns_names: Optional[List[str]]) -> (str, str):
     raw_view_query = f'Create View [raw].[V_{view_table_name}] as '
     clean_view_query = f'Create View [clean].[V_{view_table_name}] as '
     raw_view_query += f'(Select [index], '
     clean_view_query += f'(Select [index], '
 
     for column in sql_columns_names:
-        if column[0] in translate_dict.keys():
-            word_index = column[0]
-            translated_word = translate_dict[column[0]]
-            raw_view_query += f'[{word_index}] as [{translated_word}], '
-            clean_view_query += f'[{word_index}] as [{translated_word}], '
+        if column in translate_dict.keys():
+            translated_word = translate_dict[column]
+            raw_view_query += f'[{column}] as [{translated_word}], '
+            clean_view_query += f'[{column}] as [{translated_word}], '
     for column in sql_columns_names:
-        if column[0] not in translate_dict.keys() and column[0] != 'index':
-            raw_view_query += f'[{column[0]}], '
-            clean_view_query += f'[{column[0]}], '
+        if column not in translate_dict.keys() and column not in ('index', ROW_FINGERPRINT_COLUMN):
+            raw_view_query += f'[{column}], '
+            clean_view_query += f'[{column}], '
 
     raw_view_query = raw_view_query.rstrip(', ')  # Strip the last comma out of the raw_view_query
     clean_view_query = clean_view_query.rstrip(', ')  # Strip the last comma out of the raw_view_query
@@ -140,31 +268,32 @@ def _create_view_sql_query(view_table_name: str, translate_dict: Dict, table_nam
     return raw_view_query, clean_view_query
 
 
-def _is_relevant_table(translate_dict: Dict, sql_columns_names: Optional[List[Tuple]]) -> bool:
-    relevant_table: bool = False
-    for column in sql_columns_names:
-        if translate_dict.get(column[0], None):
-            relevant_table = True
-            break
-    return relevant_table
-
-
-def _create_sql_view_tables(translate_dict: Dict) -> None:
+def _create_sql_view_tables(translation_index: TranslationIndex) -> None:
     engine_path: str = create_engine_path()
     engine = create_engine(engine_path, echo=False)
 
+    # Checking the mapping files modification once per crawl step (and not on every lookup)
+    translation_index.refresh()
+    translate_dict: Dict = translation_index.dictionary()
     with engine.begin() as conn:
-        sql_table_names = conn.execute(f'Select table_name From {config.db_name}.INFORMATION_SCHEMA.TABLES').fetchall()
-        for table in sql_table_names:
-            table_name = table[0]
-            if table_name[:2] == 'V_' or table_name == 'Files_Meta_Data':
+        # All the tables columns at once (rather than a query per table)
+        sql_columns = conn.execute(f'Select table_name, column_name '
+                                   f'From {config.db_name}.INFORMATION_SCHEMA.COLUMNS').fetchall()
+        tables_columns_names: Dict[str, Dict[str, None]] = {}
+        for table_name, column_name in sql_columns:
+            # Raw and Clean tables share their names (and their columns)
+            tables_columns_names.setdefault(table_name, {})[column_name] = None
+
+        for table_name, columns_names in tables_columns_names.items():
+            if table_name[:2] == 'V_' or table_name in (FILES_META_DATA_TABLE, FILES_THROUGHPUT_TABLE):
+                continue
+
+            sql_columns_names = list(columns_names)
+            # Skipping the tables whose view tables are up to date (neither their columns nor the mapping changed)
+            if not translation_index.is_changed_table(table_name, sql_columns_names):
                 continue
 
-            sql_columns_names = conn.execute(f'Select distinct column_name '
-                                             f'From {config.db_name}.INFORMATION_SCHEMA.COLUMNS '
-                                             f'WHERE table_name = N\'{table_name}\'').fetchall()
-            relevant_table: bool = _is_relevant_table(translate_dict, sql_columns_names)
-            if relevant_table:
+            if translation_index.is_relevant_table(table_name, sql_columns_names):
                 view_table_name = table_name.replace(' ', '_')
 
                 raw_view_query, clean_view_query = _create_view_sql_query(view_table_name, translate_dict, table_name,
@@ -1,25 +1,55 @@
+import asyncio
 import os
+import time
 import pandas as pd
 import config
 
-from typing import Dict
-from data_processing import create_data_frames, data_filtering
-from database_updating import update_database, _create_sql_view_tables
+from concurrent.futures import ThreadPoolExecutor
+from operator import itemgetter
+from typing import Dict, Iterator, List, Optional, Tuple
+from data_processing import create_data_frames, data_filtering, compact_data_frames
+from database_updating import update_database, export_data_frames, _create_sql_view_tables
+from crawl_journal import CrawlJournal
 from files_cache import FilesCache
-from utils import translation_dictionary_path, read_json_translation_file
+from hash_prefetcher import HashPrefetcher
+from translation_index import TranslationIndex
+from utils import calculate_md5_hash, csv_table_name, read_excel_sheet_names
 
 """
 This module is the program's core module. It crawls over the files in a differential manner, filters any necessary 
 data frames, creates relevant tables and adds them to the DB.
 
+The crawl can run serially (file after file), or as a pipeline (pipelined=True) of three asyncio stages - discovery,
+reading/parsing and DB writing - connected by bounded queues. The blocking work of each stage is offloaded to an
+executor, so the DB round-trips of one file overlap with the parsing of the next ones, while the queues depth caps the
+number of parsed files held in memory (a full queue blocks the stages before it).
+
+The files md5 hashes are calculated ahead of the processing loop, on a thread pool (see hash_prefetcher.py).
+
+Every file's progress is committed to the crawl journal (see crawl_journal.py), so a stopped crawl is resumed from
+where it stopped, and files which keep failing are quarantined.
+
 Functions:
 
 _get_extensions() -- Formats a combined dictionary for file types corresponding to its a callback function
+_discover_files() -- Walks over all directory hierarchical files, and yields the supported ones (path and extension)
+_parse_file() -- Creates the file's (compacted) data frames (and filters them if required)
+_skipping_file() -- Checks the file in the crawl journal, whether it was completed before or it's quarantined
+_discovery_stage() -- Pipeline stage: queues the files which weren't handled before
+_parsing_stage() -- Pipeline stage: parses the queued files, and queues their data frames
+_writing_stage() -- Pipeline stage: writes the queued data frames to the DB, and adds their files to the files cache
+_crawl_pipeline() -- Runs the pipeline stages concurrently
 crawl_file() -- Crawls over all directory hierarchical files, extract relevant information, filter the files, and builds
                 relevant tables and adds them to the DB
+plan_crawl() -- Plans a crawl (a dry-run) - the new, changed, unchanged and removed files, the bytes to parse, the
+                target table of each sheet, and the estimated runtime (by the recorded crawls throughput)
 """
 
 
+# Marks the end of the files in a pipeline queue
+_END_OF_QUEUE = None
+
+
 def _get_extensions() -> Dict:
     csv_extensions: Dict = dict.fromkeys(['.csv'], pd.read_csv)
     excel_extensions: Dict = dict.fromkeys(['.xlxs', 'xlsm', '.xlsb', '.xltx', 'xltm', 'xls', '.xlt', '.xml',
@@ -29,37 +59,247 @@ def _get_extensions() -> Dict:
     return extensions
 
 
+def _discover_files(root_directory: str, extension_types: Dict) -> Iterator[Tuple[str, str]]:
+    for dir_name, sub_dir_list, file_List in os.walk(root_directory):
+        for file in file_List:
+            file_name, extension = os.path.splitext(file)
+            extension = extension.lower()
+
+            # If extension is supported and file is not open
+            if (extension in extension_types.keys()) and (file_name[0:2] != '~$'):
+                yield os.path.join(dir_name, file), extension
+
+
+def _parse_file(file_path: str, pandas_callback_function: callable, apply_data_filters: bool) -> \
+                (List[str], List[pd.DataFrame]):
+    file_name_list, data_frame_list = create_data_frames(file_path, pandas_callback_function)
+
+    if apply_data_filters:
+        data_frame_list = data_filtering(data_frame_list)
+
+    data_frame_list = compact_data_frames(data_frame_list, file_name_list, report_memory=config.report_memory_usage)
+
+    return file_name_list, data_frame_list
+
+
+def _skipping_file(file_path: str, files_cache: FilesCache, journal: CrawlJournal) -> bool:
+    # Only reads the journal - an attempt is recorded once the file's parsing actually starts (see _parsing_stage())
+    file_md5 = calculate_md5_hash(file_path)
+    if journal.resume_state(file_path, file_md5) == CrawlJournal.VIEWS_UPDATED:  # Completed before the crawl stopped
+        files_cache.add_file(file_path)
+        return True
+
+    if journal.is_quarantined(file_path, file_md5):
+        print(f'\nWarning...\n')
+        print(f'{file_path} was started {journal.max_attempts} times without completing!')
+        print(f'\n\nSkipping it (until it\'s modified)!\n')
+        return True
+
+    return False
+
+
+async def _discovery_stage(root_directory: str, extension_types: Dict, files_cache: FilesCache, journal: CrawlJournal,
+                           hash_prefetcher: HashPrefetcher, files_queue: asyncio.Queue,
+                           executor: ThreadPoolExecutor) -> None:
+    loop = asyncio.get_running_loop()
+    files_iterator = hash_prefetcher.prefetch(_discover_files(root_directory, extension_types), itemgetter(0))
+    while True:
+        discovered_file: Optional[Tuple[str, str]] = await loop.run_in_executor(executor, next, files_iterator, None)
+        if discovered_file is None:
+            break
+
+        file_path, extension = discovered_file
+        if await loop.run_in_executor(executor, files_cache.exists, file_path):
+            continue
+
+        # The journal is only accessed from the event loop's thread (the file's md5 is already cached by the prefetcher)
+        if _skipping_file(file_path, files_cache, journal):
+            continue
+
+        await files_queue.put((file_path, extension))
+
+    await files_queue.put(_END_OF_QUEUE)
+
+
+async def _parsing_stage(extension_types: Dict, apply_data_filters: bool, journal: CrawlJournal,
+                         files_queue: asyncio.Queue, data_frames_queue: asyncio.Queue,
+                         executor: ThreadPoolExecutor) -> None:
+    loop = asyncio.get_running_loop()
+    while True:
+        discovered_file = await files_queue.get()
+        if discovered_file is _END_OF_QUEUE:
+            break
+
+        file_path, extension = discovered_file
+        file_md5 = calculate_md5_hash(file_path)
+        resume_state = journal.resume_state(file_path, file_md5)
+        file_name_list, data_frame_list = None, None
+        if resume_state != CrawlJournal.WRITTEN:
+            # The attempt is recorded only now - the files waiting in the queue aren't charged if the process crashes
+            journal.start(file_path, file_md5)
+            file_name_list, data_frame_list = await loop.run_in_executor(executor, _parse_file, file_path,
+                                                                         extension_types[extension],
+                                                                         apply_data_filters)
+            journal.mark(file_path, CrawlJournal.PARSED)
+
+        await data_frames_queue.put((file_path, resume_state, file_name_list, data_frame_list))
+
+    await data_frames_queue.put(_END_OF_QUEUE)
+
+
+async def _writing_stage(translation_index: TranslationIndex, update_db: bool, export_directory: Optional[str],
+                         files_cache: FilesCache, journal: CrawlJournal, data_frames_queue: asyncio.Queue,
+                         executor: ThreadPoolExecutor) -> int:
+    loop = asyncio.get_running_loop()
+    parsed_bytes = 0
+    while True:
+        parsed_file = await data_frames_queue.get()
+        if parsed_file is _END_OF_QUEUE:
+            break
+
+        file_path, resume_state, file_name_list, data_frame_list = parsed_file
+        file_md5 = calculate_md5_hash(file_path)
+        if resume_state != CrawlJournal.WRITTEN:
+            parsed_bytes += os.path.getsize(file_path)
+            journal.start(file_path, file_md5)
+            if update_db:
+                await loop.run_in_executor(executor, update_database, data_frame_list, file_name_list, file_path,
+                                           export_directory, translation_index.dictionary())
+            elif export_directory:
+                await loop.run_in_executor(executor, export_data_frames, data_frame_list, file_name_list, file_path,
+                                           export_directory, translation_index.dictionary())
+            journal.mark(file_path, CrawlJournal.WRITTEN)
+
+        journal.start(file_path, file_md5)
+        if update_db:
+            await loop.run_in_executor(executor, _create_sql_view_tables, translation_index)
+        journal.mark(file_path, CrawlJournal.VIEWS_UPDATED)
+
+        # Only the writing stage updates the files cache (on the event loop's thread)
+        files_cache.add_file(file_path)
+
+    return parsed_bytes
+
+
+async def _crawl_pipeline(root_directory: str, extension_types: Dict, translation_index: TranslationIndex,
+                          apply_data_filters: bool, update_db: bool, export_directory: Optional[str],
+                          files_cache: FilesCache, journal: CrawlJournal, hash_prefetcher: HashPrefetcher,
+                          queue_depth: int) -> int:
+    # A zero maxsize means an unbounded asyncio queue, so the depth is at least 1
+    files_queue: asyncio.Queue = asyncio.Queue(maxsize=max(queue_depth, 1))
+    data_frames_queue: asyncio.Queue = asyncio.Queue(maxsize=max(queue_depth, 1))
+
+    # A worker per stage, so a stage never waits for another stage's blocking work
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        _, _, parsed_bytes = await asyncio.gather(
+            _discovery_stage(root_directory, extension_types, files_cache, journal, hash_prefetcher, files_queue,
+                             executor),
+            _parsing_stage(extension_types, apply_data_filters, journal, files_queue, data_frames_queue, executor),
+            _writing_stage(translation_index, update_db, export_directory, files_cache, journal, data_frames_queue,
+                           executor))
+
+    return parsed_bytes
+
+
 def crawl_file(root_directory: str,
                file_mapping_directory: str,
                apply_data_filters: bool,
-               update_db: bool = False) -> None:
+               update_db: bool = False,
+               pipelined: bool = False,
+               queue_depth: int = 2,
+               export_directory: Optional[str] = None) -> None:
 
     extension_types = _get_extensions()
 
-    # Fetching the all file's columns translation dictionary
-    translate_index_file_path = translation_dictionary_path(file_mapping_directory)
-    translate_dict: Dict = read_json_translation_file(translate_index_file_path)
+    # Exporting the clean tables to Parquet files as well (if an export directory is provided/configured), also when
+    # the DB isn't updated
+    export_directory = export_directory or config.parquet_export_path
 
-    with FilesCache(config.connection_string) as files_cache:
-        for dir_name, sub_dir_list, file_List in os.walk(root_directory):
-            for file in file_List:
-                file_name, extension = os.path.splitext(file)
-                extension = extension.lower()
+    # Indexing the files columns translation dictionaries (once per crawl)
+    translation_index = TranslationIndex(file_mapping_directory)
 
-                # If extension is supported and file is not open
-                if (extension in extension_types.keys()) and (file_name[0:2] != '~$'):
-                    file_path = os.path.join(dir_name, file)
+    crawl_start_time = time.perf_counter()
+    parsed_bytes = 0
 
-                    if files_cache.exists(file_path):
-                        continue
+    # The journal is closed after the files cache is saved, so completed files are only cleared from it afterwards
+    with CrawlJournal(config.journal_path, config.max_file_attempts) as journal, \
+            FilesCache(config.connection_string) as files_cache, \
+            HashPrefetcher(config.hash_prefetch_workers, config.hash_prefetch_bytes) as hash_prefetcher:
+        if pipelined:
+            parsed_bytes = asyncio.run(_crawl_pipeline(root_directory, extension_types, translation_index,
+                                                       apply_data_filters, update_db, export_directory, files_cache,
+                                                       journal, hash_prefetcher, queue_depth))
+        else:
+            for file_path, extension in hash_prefetcher.prefetch(_discover_files(root_directory, extension_types),
+                                                                 itemgetter(0)):
+                if files_cache.exists(file_path):
+                    continue
 
-                    file_name_list, data_frame_list = create_data_frames(file_path, extension_types[extension])
+                if _skipping_file(file_path, files_cache, journal):
+                    continue
 
-                    if apply_data_filters:
-                        data_frame_list = data_filtering(data_frame_list)
+                # Every step records an attempt when it starts, which is released when it completes
+                file_md5 = calculate_md5_hash(file_path)
+                if journal.resume_state(file_path, file_md5) != CrawlJournal.WRITTEN:
+                    parsed_bytes += os.path.getsize(file_path)
+                    journal.start(file_path, file_md5)
+                    file_name_list, data_frame_list = _parse_file(file_path, extension_types[extension],
+                                                                  apply_data_filters)
+                    journal.mark(file_path, CrawlJournal.PARSED)
 
+                    journal.start(file_path, file_md5)
                     if update_db:
-                        update_database(data_frame_list, file_name_list)
-                        _create_sql_view_tables(translate_dict)
+                        update_database(data_frame_list, file_name_list, file_path, export_directory,
+                                        translation_index.dictionary())
+                    elif export_directory:
+                        export_data_frames(data_frame_list, file_name_list, file_path, export_directory,
+                                           translation_index.dictionary())
+                    journal.mark(file_path, CrawlJournal.WRITTEN)
+
+                journal.start(file_path, file_md5)
+                if update_db:
+                    _create_sql_view_tables(translation_index)
+                journal.mark(file_path, CrawlJournal.VIEWS_UPDATED)
+
+                files_cache.add_file(file_path)
+
+        # Recording the crawl's throughput (for the crawl plan's runtime estimation)
+        if parsed_bytes:
+            files_cache.record_throughput(parsed_bytes, time.perf_counter() - crawl_start_time)
+
+
+def plan_crawl(root_directory: str) -> Dict:
+    # Discovery and files cache check only - no spreadsheet is parsed, and nothing is written to the DB
+    extension_types = _get_extensions()
+    plan: Dict = {'new': [], 'changed': [], 'unchanged': [], 'removed': [], 'bytes_to_parse': 0, 'tables': {},
+                  'estimated_time': None}
+
+    with FilesCache(config.connection_string, read_only=True) as files_cache, \
+            HashPrefetcher(config.hash_prefetch_workers, config.hash_prefetch_bytes) as hash_prefetcher:
+        cached_paths = set(files_cache.existing_table['File_path'])
+        discovered_paths = set()
+        # Only files which match the files cache's meta data need their md5 (for checking whether they've changed)
+        for file_path, extension in hash_prefetcher.prefetch(_discover_files(root_directory, extension_types),
+                                                             itemgetter(0), files_cache.has_meta_data):
+            discovered_paths.add(file_path)
+            if files_cache.exists(file_path):
+                plan['unchanged'].append(file_path)
+                continue
+
+            plan['changed' if file_path in cached_paths else 'new'].append(file_path)
+            plan['bytes_to_parse'] += os.path.getsize(file_path)
+            # The target table of each sheet (the file's name for a csv file)
+            if extension_types[extension] is pd.read_csv:
+                plan['tables'][file_path] = [csv_table_name(file_path)]
+            else:
+                plan['tables'][file_path] = read_excel_sheet_names(file_path)
+
+        root_path = os.path.join(root_directory, '')
+        plan['removed'] = sorted(file_path for file_path in cached_paths - discovered_paths
+                                 if file_path.startswith(root_path))
+
+        throughput = files_cache.throughput()
+        if throughput:
+            plan['estimated_time'] = plan['bytes_to_parse'] / throughput
 
-                    files_cache.add_file(file_path)
+    return plan
@@ -1,14 +1,16 @@
+import time
 import pandas as pd
 
 from sqlalchemy import create_engine, INTEGER
 from sqlalchemy.engine import Engine
 from database_updating import _fetching_sql_file_meta_data_table
-from utils import calculate_md5_hash, extract_file_information, FILES_META_DATA_TABLE
+from typing import Optional
+from utils import calculate_md5_hash, extract_file_information, FILES_META_DATA_TABLE, FILES_THROUGHPUT_TABLE
 
 """
 This module represents a system cache for all crawled files. It is responsible for maintaining an open engine connection
 with the DB (reduces number of calls), and for the differential crawling and file handling, and also for updating the 
-Meta data files table in the DB.
+Meta data files table in the DB. A read-only files cache (e.g. for a crawl plan) never writes to the DB.
 
 Functions:
 
@@ -16,22 +18,32 @@ __init__() -- Callable within calling creating a class's attribute
 __enter__() -- Executed when entering the scope after creating a class attribute
 __exit__() -- Executed after exiting the scope in which the class's attribute was created
 _connect() -- Opens a connection with the DB, and fetches the files Meta data table
-_disconnect() -- Closes the connection with the DB, and Calls the updating Meta data table function
+_disconnect() -- Closes the connection with the DB, and Calls the updating Meta data table function (unless read-only)
 _clear() -- Drops the meta data table in DB and updates the existing meta data table to be an empty data frame
+_same_meta_data() -- Matches a file's meta data (name, path and dates) against the Meta data table
 exists() -- Checks whether a file was already added to the DB before (for differentiability)
+has_meta_data() -- Checks whether a file's meta data matches the Meta data table (its md5 is then needed for exists())
 add_file() -- Adding a file to the Meta data table
 _dump_existing() -- Updates the Meta data table in DB
+record_throughput() -- Adds a crawl's parsing throughput (parsed bytes and elapsed time) to the throughput table in DB
+throughput() -- Returns the recent crawls parsing throughput (in [bytes/sec]), None if there's no recorded crawl yet
 """
 
 
+# The number of recent crawls the throughput is averaged over
+RECENT_CRAWLS_COUNT = 10
+
+
 class FilesCache:
     _date_columns_list = ['Modification_date', 'Creation_date']
     engine: Engine
     conn: Engine
     existing_table: pd.DataFrame
+    read_only: bool
 
-    def __init__(self, connection_string: str) -> None:
+    def __init__(self, connection_string: str, read_only: bool = False) -> None:
         self.engine = create_engine(connection_string, echo=False)
+        self.read_only = read_only
 
     def __enter__(self):
         self._connect()
@@ -46,7 +58,8 @@ class FilesCache:
         self.existing_table = _fetching_sql_file_meta_data_table(self.conn)
 
     def _disconnect(self):
-        self._dump_existing()
+        if not self.read_only:
+            self._dump_existing()
         if self.conn and not self.conn.closed:
             self.conn.close()
 
@@ -59,14 +72,27 @@ class FilesCache:
             # Initialize existing table to be an empty data frame
             self.existing_table = _fetching_sql_file_meta_data_table(self.conn)
 
-    def exists(self, file_path: str) -> bool:
+    @staticmethod
+    def _same_meta_data(existing_table: pd.DataFrame, file_path: str) -> pd.Series:
         file_name, modification_date, creation_date = extract_file_information(file_path)
 
-        return ((self.existing_table['File_name'] == file_name) &
-                (self.existing_table['File_path'] == file_path) &
-                (self.existing_table['Modification_date'] == modification_date) &
-                (self.existing_table['Creation_date'] == creation_date) &
-                (self.existing_table['File_md5'] == calculate_md5_hash(file_path))).any()
+        return ((existing_table['File_name'] == file_name) &
+                (existing_table['File_path'] == file_path) &
+                (existing_table['Modification_date'] == modification_date) &
+                (existing_table['Creation_date'] == creation_date))
+
+    def exists(self, file_path: str) -> bool:
+        # A single reference, as add_file() may replace the table meanwhile (when called from another thread)
+        existing_table = self.existing_table
+
+        same_meta_data = self._same_meta_data(existing_table, file_path)
+        if not same_meta_data.any():  # A new or modified file - no need for calculating its md5
+            return False
+
+        return (same_meta_data & (existing_table['File_md5'] == calculate_md5_hash(file_path))).any()
+
+    def has_meta_data(self, file_path: str) -> bool:
+        return self._same_meta_data(self.existing_table, file_path).any()
 
     def add_file(self, file_path: str) -> None:
         file_name, modification_date, creation_date = extract_file_information(file_path)
@@ -86,3 +112,22 @@ class FilesCache:
         # In sqlite we'll be changing column's date type to INTEGER (There's no DATETIME2 type)
         date_time2_dict = {col_name: INTEGER for col_name in self._date_columns_list}
         self.existing_table.to_sql(FILES_META_DATA_TABLE, self.conn, if_exists='replace', dtype=date_time2_dict)
+
+    def record_throughput(self, parsed_bytes: int, elapsed_time: float) -> None:
+        throughput_table = pd.DataFrame({'Crawl_date': [int(time.time())],
+                                         'Parsed_bytes': [parsed_bytes],
+                                         'Elapsed_time': [elapsed_time]})
+        throughput_table.to_sql(FILES_THROUGHPUT_TABLE, self.conn, if_exists='append', index=False)
+
+    def throughput(self) -> Optional[float]:
+        try:  # Check if the table 'Files_Throughput' already exists
+            throughput_table = pd.read_sql(f'SELECT * FROM [{FILES_THROUGHPUT_TABLE}];', self.conn)
+        except Exception:  # No crawl was recorded yet
+            return None
+
+        recent_crawls = throughput_table.sort_values('Crawl_date').tail(RECENT_CRAWLS_COUNT)
+        elapsed_time = recent_crawls['Elapsed_time'].sum()
+        if not elapsed_time:
+            return None
+
+        return recent_crawls['Parsed_bytes'].sum() / elapsed_time
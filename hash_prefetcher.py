@@ -0,0 +1,116 @@
+import os
+import threading
+
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Deque, Iterable, Iterator, Optional, Tuple, TypeVar
+from utils import calculate_md5_hash
+
+"""
+This module prefetches the files md5 hashes on a thread pool, ahead of the files processing loop. Hashing is file
+reading plus hashlib (which releases the GIL), so several files are hashed concurrently. The hashes are stored in the
+md5 LRU Cache of calculate_md5_hash(), which is the one used by the files cache - by the time the processing loop
+checks a file, its md5 is already calculated.
+
+The concurrency is limited by the number of workers, and by a budget of bytes in flight (the total size of the files
+being hashed at once), so a network share is saturated without being thrashed. A file larger than the whole budget is
+hashed alone.
+
+Functions:
+
+__init__() -- Callable within calling creating a class's attribute
+__enter__() -- Executed when entering the scope after creating a class attribute
+__exit__() -- Executed after exiting the scope in which the class's attribute was created
+_acquire_bytes() -- Waits until the file's size fits in the bytes in flight budget, and reserves it
+_release_bytes() -- Releases the file's size from the bytes in flight budget
+_hash_file() -- Calculates a file's md5 (into the LRU Cache) within the bytes in flight budget
+prefetch() -- Yields the given items in order, while hashing the files of the next items ahead
+_next_ready() -- Pops the oldest item, once its file's md5 is calculated
+"""
+
+
+Item = TypeVar('Item')
+
+# The number of files hashed ahead per worker (bounded by the md5 LRU Cache's size, so no prefetched md5 is evicted)
+LOOKAHEAD_PER_WORKER = 4
+
+
+class HashPrefetcher:
+    max_workers: int
+    max_bytes_in_flight: int
+    executor: Optional[ThreadPoolExecutor]
+    _bytes_in_flight: int
+    _budget_condition: threading.Condition
+
+    def __init__(self, max_workers: int = 4, max_bytes_in_flight: int = 2**28) -> None:
+        self.max_workers = max(max_workers, 1)
+        self.max_bytes_in_flight = max(max_bytes_in_flight, 1)
+        self.executor = None
+        self._bytes_in_flight = 0
+        self._budget_condition = threading.Condition()
+
+    def __enter__(self):
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='md5_prefetch')
+
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.executor.shutdown(wait=True)
+        self.executor = None
+
+    def _acquire_bytes(self, file_size: int) -> int:
+        # A file larger than the whole budget reserves all of it
+        file_size = min(file_size, self.max_bytes_in_flight)
+        with self._budget_condition:
+            self._budget_condition.wait_for(lambda: self._bytes_in_flight + file_size <= self.max_bytes_in_flight)
+            self._bytes_in_flight += file_size
+
+        return file_size
+
+    def _release_bytes(self, file_size: int) -> None:
+        with self._budget_condition:
+            self._bytes_in_flight -= file_size
+            self._budget_condition.notify_all()
+
+    def _hash_file(self, file_path: str) -> None:
+        try:
+            reserved_size = self._acquire_bytes(os.path.getsize(file_path))
+        except OSError:  # The file was removed (or isn't accessible) - the processing loop will handle it
+            return
+
+        try:
+            calculate_md5_hash(file_path)
+        except OSError:
+            pass
+        finally:
+            self._release_bytes(reserved_size)
+
+    def prefetch(self, items: Iterable[Item], file_path_key: Callable[[Item], str] = lambda item: item,
+                 needs_hash: Callable[[str], bool] = lambda file_path: True) -> Iterator[Item]:
+        lookahead = min(self.max_workers * LOOKAHEAD_PER_WORKER, calculate_md5_hash.cache_info().maxsize // 2)
+        pending: Deque[Tuple[Item, Optional[Future]]] = deque()
+
+        try:
+            for item in items:
+                file_path = file_path_key(item)
+                future = self.executor.submit(self._hash_file, file_path) if needs_hash(file_path) else None
+                pending.append((item, future))
+
+                if len(pending) > lookahead:
+                    yield self._next_ready(pending)
+
+            while pending:
+                yield self._next_ready(pending)
+        finally:  # If the processing loop stopped early, the files which weren't hashed yet are no longer needed
+            for _, future in pending:
+                if future is not None:
+                    future.cancel()
+
+    @staticmethod
+    def _next_ready(pending: Deque[Tuple[Item, Optional[Future]]]) -> Item:
+        # Waiting for the oldest item's md5, so the processing loop doesn't calculate it again concurrently
+        item, future = pending.popleft()
+        if future is not None:
+            future.result()
+
+        return item
@@ -1,9 +1,7 @@
 import json
-import config
 import click
 
 from typing import Dict
-from file_crawler import crawl_file
 
 
 """
@@ -16,6 +14,9 @@ The user needs to enter three arguments,
 If the user didn't specify any arguments, a default paths for the root directory and for the file mapping directory is 
 taken from the config file. Applying filters won't happen in this case.
 
+The heavy dependencies (pandas, numpy, SQLAlchemy, python-dotenv) are imported only inside the commands that need them
+(and the config module only when a default value is required), so the CLI itself starts fast.
+
 Dynamic objects:
 
 root_directory -- A path which contains the files that needs to be handled
@@ -33,11 +34,16 @@ crawl_file() -- The core function of the code. Crawls on all the differentiable
                 required fields into the corresponding one in the translation dictionary. It then creates a raw and 
                 clean tables in the SQLite database and saves it there (concatenating tables in future runs), and in 
                 addition creates a view table which in it presents the cleaned and translated (mapped) data fields
+plan_crawl() -- A dry-run of crawl_file(). Reports which files would be handled (new, changed, unchanged and removed
+                ones), the bytes to parse, the target table of each sheet and the estimated runtime, without parsing or
+                writing anything
 """
 
 
 def default_callback_builder(message):
     def inner():
+        import config
+
         click.echo(message)
 
         return config.path
@@ -45,6 +51,12 @@ def default_callback_builder(message):
     return inner
 
 
+def default_translation_dict_path():
+    import config
+
+    return f'{config.path_mapping}\\oxford_dictionary_translation.json'
+
+
 @click.group()
 def cli():
     pass
@@ -54,12 +66,39 @@ def cli():
 @click.option('--root_directory', default=default_callback_builder("Taking root dir from environment variable"))
 @click.option('--file_mapping_directory', default=default_callback_builder("Taking files dir from environment variable"))
 @click.option('--apply_data_filters', default=False)
-def process_files(root_directory, file_mapping_directory, apply_data_filters):
-    crawl_file(root_directory, file_mapping_directory, apply_data_filters)
+@click.option('--pipelined', default=False, help="Overlap files parsing with DB writing (asyncio pipeline)")
+@click.option('--queue_depth', default=2, type=click.IntRange(min=1),
+              help="Max parsed files waiting between pipeline stages")
+@click.option('--export_directory', default=None, help="Export the clean tables to partitioned Parquet files as well")
+def process_files(root_directory, file_mapping_directory, apply_data_filters, pipelined, queue_depth, export_directory):
+    from file_crawler import crawl_file
+
+    crawl_file(root_directory, file_mapping_directory, apply_data_filters, pipelined=pipelined,
+               queue_depth=queue_depth, export_directory=export_directory)
+
+
+@cli.command(help="This command plans a crawl of the provided directory (a dry-run) - nothing is parsed or written")
+@click.option('--root_directory', default=default_callback_builder("Taking root dir from environment variable"))
+def plan(root_directory):
+    from file_crawler import plan_crawl
+
+    crawl_plan = plan_crawl(root_directory)
+
+    click.echo(f"New files: {len(crawl_plan['new'])}")
+    click.echo(f"Changed files: {len(crawl_plan['changed'])}")
+    click.echo(f"Unchanged files: {len(crawl_plan['unchanged'])}")
+    click.echo(f"Removed files: {len(crawl_plan['removed'])}")
+    click.echo(f"Bytes to parse: {crawl_plan['bytes_to_parse']}")
+    for file_path, table_names in crawl_plan['tables'].items():
+        click.echo(f"  {file_path} -> {', '.join(table_names) if table_names is not None else '<unknown sheets>'}")
+    if crawl_plan['estimated_time'] is None:
+        click.echo("Estimated runtime: unknown (no recorded crawl yet)")
+    else:
+        click.echo(f"Estimated runtime: {crawl_plan['estimated_time']:.1f} [sec]")
 
 
 @cli.command()
-@click.option('--translation_dict_path', default=f'{config.path_mapping}\\oxford_dictionary_translation.json')
+@click.option('--translation_dict_path', default=default_translation_dict_path)
 def create_mapping_dictionary(translation_dict_path):
     file_index_translate: Dict = {
         'Date_Different_Language': 'Date',
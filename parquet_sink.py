@@ -0,0 +1,114 @@
+import json
+import os
+import time
+import uuid
+import pandas as pd
+
+from datetime import date
+from typing import Dict, List, Optional
+
+"""
+This module is an alternative output sink for the Clean tables - partitioned Parquet files (columnar, and much faster to
+read back than the DB tables). Each crawl appends the new clean rows of every table as a new Parquet file, partitioned
+by the source file and by the ingest date:
+
+<export_directory>/<table_name>/Source_file=<file name>/Ingest_date=<YYYY-MM-DD>/part-<uuid>.parquet
+
+The columns are named by the mapping dictionary (as in the view tables). Every written file is appended to an
+append-only manifest (a json line per file, with an increasing sequence number), so consumers can read only the files
+which were added since the last sequence number they've read.
+
+Requires pyarrow (an optional dependency - only needed when exporting).
+
+Functions:
+
+_partition_value() -- Formats a value to be used in a partition directory's name
+_read_manifest_lines() -- Reads the manifest's entries
+_last_manifest_sequence() -- Returns the manifest's last sequence number (reading only its last line)
+read_manifest() -- Returns the manifest's entries which were added after a given sequence number
+_add_to_parquet() -- Writes a clean table's new rows as a new Parquet partition file, and adds it to the manifest
+"""
+
+
+MANIFEST_FILE = '_manifest.jsonl'
+# The manifest's last line is read backwards by blocks of this size
+MANIFEST_TAIL_BLOCK_SIZE = 4096
+
+
+def _partition_value(value: str) -> str:
+    # The source file's name only (the path might be a Windows one), without characters reserved in partition paths
+    value = value.replace('\\', '/').split('/')[-1]
+    for reserved_char in ('=', ':', '*', '?', '"', '<', '>', '|'):
+        value = value.replace(reserved_char, '_')
+
+    return value
+
+
+def _read_manifest_lines(export_directory: str) -> List[Dict]:
+    manifest_path = os.path.join(export_directory, MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        return []
+
+    with open(manifest_path, 'r', encoding='utf-8') as manifest_file:
+        return [json.loads(line) for line in manifest_file if line.strip()]
+
+
+def _last_manifest_sequence(export_directory: str) -> int:
+    manifest_path = os.path.join(export_directory, MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        return 0
+
+    with open(manifest_path, 'rb') as manifest_file:
+        position = manifest_file.seek(0, os.SEEK_END)
+        manifest_tail = b''
+        # Reading backwards until the tail holds a whole (non empty) last line
+        while position > 0 and manifest_tail.strip().count(b'\n') < 1:
+            block_size = min(MANIFEST_TAIL_BLOCK_SIZE, position)
+            position -= block_size
+            manifest_file.seek(position)
+            manifest_tail = manifest_file.read(block_size) + manifest_tail
+
+    last_line = manifest_tail.strip().split(b'\n')[-1]
+    return json.loads(last_line.decode('utf-8'))['sequence'] if last_line else 0
+
+
+def read_manifest(export_directory: str, after_sequence: int = 0) -> List[Dict]:
+    return [entry for entry in _read_manifest_lines(export_directory) if entry['sequence'] > after_sequence]
+
+
+def _add_to_parquet(clean_table: pd.DataFrame, table_name: str, source_file: str, export_directory: str,
+                    translate_dict: Optional[Dict[str, str]] = None) -> None:
+    try:
+        import pyarrow  # noqa: F401 - Only checking that the Parquet engine is installed
+    except ImportError as exc:
+        raise ImportError('Exporting to Parquet requires pyarrow (pip install pyarrow)') from exc
+
+    if clean_table.empty:
+        return
+
+    ingest_date = date.today().isoformat()
+    partition_directory = os.path.join(export_directory, table_name, f'Source_file={_partition_value(source_file)}',
+                                       f'Ingest_date={ingest_date}')
+    os.makedirs(partition_directory, exist_ok=True)
+
+    # Translated columns names, and the SQL's 'index' column kept as a regular column
+    parquet_table = clean_table.rename(columns=translate_dict or {}).reset_index()
+    parquet_table.columns = [str(column) for column in parquet_table.columns]
+
+    # Writing to a temporary file first, so a consumer never reads a partially written file. The temporary file is a
+    # hidden one ('.' prefixed), which Parquet dataset readers skip (even if it's left behind by a crash)
+    parquet_file = f'part-{uuid.uuid4().hex}.parquet'
+    parquet_path = os.path.join(partition_directory, parquet_file)
+    temporary_path = os.path.join(partition_directory, f'.{parquet_file}.tmp')
+    parquet_table.to_parquet(temporary_path, engine='pyarrow', index=False)
+    os.replace(temporary_path, parquet_path)
+
+    entry: Dict = {'sequence': _last_manifest_sequence(export_directory) + 1,
+                   'table_name': table_name,
+                   'source_file': source_file,
+                   'ingest_date': ingest_date,
+                   'path': os.path.relpath(parquet_path, export_directory),
+                   'rows': len(parquet_table),
+                   'written_at': int(time.time())}
+    with open(os.path.join(export_directory, MANIFEST_FILE), 'a', encoding='utf-8') as manifest_file:
+        manifest_file.write(json.dumps(entry, ensure_ascii=False) + '\n')
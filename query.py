@@ -0,0 +1,156 @@
+import numpy as np
+import pandas as pd
+import config
+
+from sqlalchemy import create_engine, inspect, text, bindparam
+from sqlalchemy.engine import Engine
+from sqlalchemy.sql.elements import TextClause
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+from translation_index import TranslationIndex
+from utils import create_engine_path
+
+"""
+This module is the querying interface over the Raw and Clean tables (and their V_* view tables) in the DB. Only the
+required columns are selected (projection), and the filters are pushed down into the SQL query's WHERE clause, so only
+the required subset of the table is read. Columns can be referred to by their original or by their translated names
+(resolved against the queried table's columns through the mapping dictionary). With a chunksize, the rows are read
+lazily - chunk by chunk.
+
+A filter is a (column, operator, value) tuple, for example: ('Date', '>=', '2021-01-01'), ('House', 'in', ['A', 'B'])
+or ('Building', 'is not null', None). All the filters are combined with AND.
+
+All the tables columns are text (NVARCHAR), and their numeric cells are stored as floats text (e.g. '20.0', see
+_pandas_to_numeric()). So a numeric filter value (by the same rule - 20, 20.0 and '20' are alike) is compared
+numerically, against the column's numeric cells only. Any other value is compared with the cells text as-is.
+
+Functions:
+
+_quote() -- Quotes an SQL identifier (a schema, table or column name)
+_resolve_column() -- Resolves a column's name (original or translated) into the queried table's column name
+_numeric_value() -- Returns a filter value as a float if it's numeric (as the numeric cells are stored), otherwise None
+_numeric_column() -- Converts a column's numeric cells into floats in the SQL query (its other cells into NULLs)
+_build_query() -- Builds the SQL query (projection and filters) and its parameters
+read_table() -- Reads a table (or its view table) from the DB, as a data frame or as an iterator of data frames chunks
+"""
+
+
+SCHEMAS = ('raw', 'clean')
+FILTER_OPERATORS = ('=', '!=', '<', '<=', '>', '>=', 'in', 'not in', 'like', 'is null', 'is not null')
+
+
+def _quote(identifier: str) -> str:
+    return '[' + identifier.replace(']', ']]') + ']'
+
+
+def _resolve_column(column_name: str, translate_dict: Dict[str, str], view: bool,
+                    table_columns: Sequence[str]) -> Tuple[str, str]:
+    # Returns the queried table's column name, and the name the column should be returned under
+    if view:  # View tables columns are already translated
+        return translate_dict.get(column_name, column_name), translate_dict.get(column_name, column_name)
+
+    if column_name in table_columns:
+        return column_name, column_name
+
+    # Several original names might be translated into the same name, so only the table's own columns are considered
+    for table_column in table_columns:
+        if translate_dict.get(table_column, None) == column_name:
+            return table_column, column_name
+
+    raise ValueError(f'Unknown column: {column_name}! (neither a column of the table, nor a translation of one)')
+
+
+def _numeric_value(value: Any) -> Optional[float]:
+    numeric_value = pd.to_numeric(value, errors='coerce')
+    if numeric_value > -np.inf:  # Is numeric
+        return float(numeric_value)
+
+    return None
+
+
+def _numeric_column(sql_column: str, dialect_name: str) -> str:
+    if dialect_name == 'sqlite':  # There's no TRY_CAST - a numeric cell's text is kept when converted to a float
+        return f'(CASE WHEN CAST(CAST({sql_column} AS REAL) AS TEXT) = {sql_column} ' \
+               f'THEN CAST({sql_column} AS REAL) END)'
+
+    return f'TRY_CAST({sql_column} AS FLOAT)'
+
+
+def _build_query(table_name: str, schema: str, view: bool, columns: Optional[Sequence[str]],
+                 filters: Optional[Sequence[Tuple[str, str, Any]]], translate_dict: Dict[str, str],
+                 table_columns: Sequence[str] = (), dialect_name: str = 'mssql') -> (TextClause, Dict[str, Any]):
+    if schema.lower() not in SCHEMAS:
+        raise ValueError(f'Unknown schema: {schema}! (expected one of {SCHEMAS})')
+    if view:
+        table_name = f'V_{table_name.replace(" ", "_")}'
+
+    if columns:
+        projection_list: List[str] = [_quote('index')]
+        for column in columns:
+            sql_column, result_column = _resolve_column(column, translate_dict, view, table_columns)
+            projection_list.append(f'{_quote(sql_column)} AS {_quote(result_column)}')
+        projection = ', '.join(projection_list)
+    else:
+        projection = '*'
+
+    conditions_list: List[str] = []
+    parameters: Dict[str, Any] = {}
+    expanding_parameters: List[str] = []
+    for i, (column, operator, value) in enumerate(filters or []):
+        operator = operator.lower()
+        if operator not in FILTER_OPERATORS:
+            raise ValueError(f'Unknown filter operator: {operator}! (expected one of {FILTER_OPERATORS})')
+
+        sql_column = _quote(_resolve_column(column, translate_dict, view, table_columns)[0])
+        if operator in ('is null', 'is not null'):
+            conditions_list.append(f'{sql_column} {operator.upper()}')
+            continue
+
+        parameter = f'filter_{i}'
+        values = list(value) if operator in ('in', 'not in') else [value]
+        numeric_values = [_numeric_value(filter_value) for filter_value in values] if operator != 'like' else [None]
+        if None not in numeric_values:  # Numeric values are compared with the column's numeric cells
+            sql_column = _numeric_column(sql_column, dialect_name)
+            values = numeric_values
+
+        parameters[parameter] = values[0]
+        if operator in ('in', 'not in'):
+            parameters[parameter] = values
+            expanding_parameters.append(parameter)
+        conditions_list.append(f'{sql_column} {operator.upper()} :{parameter}')
+
+    query = f'SELECT {projection} FROM {_quote(schema.lower())}.{_quote(table_name)}'
+    if conditions_list:
+        query += ' WHERE ' + ' AND '.join(conditions_list)
+
+    sql_query = text(query + ';')
+    if expanding_parameters:
+        sql_query = sql_query.bindparams(*[bindparam(parameter, expanding=True) for parameter in expanding_parameters])
+
+    return sql_query, parameters
+
+
+def read_table(table_name: str,
+               columns: Optional[Sequence[str]] = None,
+               filters: Optional[Sequence[Tuple[str, str, Any]]] = None,
+               schema: str = 'clean',
+               view: bool = False,
+               chunksize: Optional[int] = None,
+               translation_index: Optional[TranslationIndex] = None,
+               engine: Optional[Engine] = None) -> Union[pd.DataFrame, Iterator[pd.DataFrame]]:
+    if engine is None:
+        engine = create_engine(create_engine_path(), echo=False)
+
+    # The mapping dictionary (and the table's columns) are only needed for resolving the required columns and filters
+    translate_dict: Dict[str, str] = {}
+    table_columns: List[str] = []
+    if columns or filters:
+        translation_index = translation_index or TranslationIndex(config.path_mapping)
+        translate_dict = translation_index.dictionary()
+        if not view and schema.lower() in SCHEMAS:
+            table_columns = [column['name'] for column in
+                             inspect(engine).get_columns(table_name, schema=schema.lower())]
+
+    sql_query, parameters = _build_query(table_name, schema, view, columns, filters, translate_dict, table_columns,
+                                         engine.dialect.name)
+
+    return pd.read_sql(sql_query, engine, index_col='index', params=parameters, chunksize=chunksize)
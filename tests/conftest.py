@@ -0,0 +1,22 @@
+from pytest import fixture
+from sqlalchemy import create_engine, event
+
+
+@fixture(scope='function')
+def engine(tmp_path):
+    # The 'raw' and 'clean' schemas are attached SQLite databases (SQLite accepts the [raw].[table] bracket quoting)
+    sqlite_engine = create_engine(f'sqlite:///{tmp_path / "database.db"}', echo=False)
+
+    @event.listens_for(sqlite_engine, 'connect')
+    def attach_schemas(dbapi_connection, connection_record):
+        # The transactions are begun by SQLAlchemy (below), so DDL statements are rolled back too (as in MSSQL)
+        dbapi_connection.isolation_level = None
+        for schema in ('raw', 'clean'):
+            dbapi_connection.execute(f"ATTACH DATABASE '{tmp_path / f'{schema}.db'}' AS {schema}")
+
+    @event.listens_for(sqlite_engine, 'begin')
+    def begin_transaction(conn):
+        conn.exec_driver_sql('BEGIN')
+
+    yield sqlite_engine
+    sqlite_engine.dispose()
@@ -0,0 +1,57 @@
+from pytest import fixture
+from crawl_journal import CrawlJournal
+
+FILE_PATH = r'tests_files\Test_file_1.txt'
+FILE_MD5 = 'd41d8cd98f00b204e9800998ecf8427e'
+
+
+@fixture(scope='function')
+def journal_path(tmp_path):
+    return str(tmp_path / 'crawl_journal.db')
+
+
+def test_new_file_starts_discovered(journal_path):
+    with CrawlJournal(journal_path) as journal:
+        assert journal.resume_state(FILE_PATH, FILE_MD5) is None, "Journal suppose to be empty"
+        assert journal.start(FILE_PATH, FILE_MD5) == CrawlJournal.DISCOVERED
+
+
+def test_resume_after_crash(journal_path):
+    journal = CrawlJournal(journal_path)
+    journal._connect()
+    journal.start(FILE_PATH, FILE_MD5)
+    journal.mark(FILE_PATH, CrawlJournal.WRITTEN)
+    journal._disconnect()  # A crash - the journal isn't cleared
+
+    with CrawlJournal(journal_path) as journal:
+        assert journal.resume_state(FILE_PATH, FILE_MD5) == CrawlJournal.WRITTEN, "File's progress wasn't persisted!"
+        assert journal.start(FILE_PATH, FILE_MD5) == CrawlJournal.WRITTEN, "Written file should resume from there"
+        assert journal.start(FILE_PATH, 'modified_md5') == CrawlJournal.DISCOVERED, "Modified file should start over"
+
+
+def test_quarantine_after_max_attempts(journal_path):
+    with CrawlJournal(journal_path, max_attempts=2) as journal:
+        journal.start(FILE_PATH, FILE_MD5)
+        assert not journal.is_quarantined(FILE_PATH, FILE_MD5)
+        journal.start(FILE_PATH, FILE_MD5)
+        assert journal.is_quarantined(FILE_PATH, FILE_MD5), "File wasn't quarantined after max attempts!"
+        assert not journal.is_quarantined(FILE_PATH, 'modified_md5'), "Modified file should leave the quarantine"
+
+
+def test_completed_files_cleared_on_exit(journal_path):
+    with CrawlJournal(journal_path) as journal:
+        journal.start(FILE_PATH, FILE_MD5)
+        journal.mark(FILE_PATH, CrawlJournal.VIEWS_UPDATED)
+
+    with CrawlJournal(journal_path) as journal:
+        assert journal.resume_state(FILE_PATH, FILE_MD5) is None, "Completed files weren't cleared from the journal!"
+
+
+def test_completed_step_releases_attempt(journal_path):
+    with CrawlJournal(journal_path, max_attempts=2) as journal:
+        for _ in range(2):  # Parsed, and then waiting for writing when the process crashed
+            journal.start(FILE_PATH, FILE_MD5)
+            journal.mark(FILE_PATH, CrawlJournal.PARSED)
+
+        assert not journal.is_quarantined(FILE_PATH, FILE_MD5), "File was charged for steps which have completed!"
+        assert journal.start(FILE_PATH, FILE_MD5) == CrawlJournal.PARSED
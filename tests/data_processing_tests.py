@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+
+from data_processing import _row_fingerprints, _removing_duplicates, _wrong_data_filtering
+
+
+def test_fingerprints_dont_depend_on_columns_order():
+    data_frame = pd.DataFrame({'Duration': [20, 30], 'Mass': ['1.2', 'a'], 'RMI': [np.nan, 50]})
+    reordered_data_frame = data_frame[['RMI', 'Duration', 'Mass']]
+
+    assert list(_row_fingerprints(data_frame)) == list(_row_fingerprints(reordered_data_frame)), \
+        "Fingerprints depend on the columns order!"
+
+
+def test_fingerprints_ignore_all_null_columns():
+    data_frame = pd.DataFrame({'Duration': [20, 30], 'Mass': ['1.2', 'a']})
+    extended_data_frame = data_frame.assign(Frequency=np.nan)
+
+    assert list(_row_fingerprints(data_frame)) == list(_row_fingerprints(extended_data_frame)), \
+        "Fingerprints changed when an all-null column was added!"
+
+
+def test_fingerprints_normalize_numeric_cells():
+    string_data_frame = pd.DataFrame({'Duration': ['1', ' 2 '], 'Mass': ['a', 'b']})
+    float_data_frame = pd.DataFrame({'Duration': [1.0, 2], 'Mass': ['a', 'b']})
+
+    assert list(_row_fingerprints(string_data_frame)) == list(_row_fingerprints(float_data_frame)), \
+        "'1' and 1.0 got different fingerprints!"
+    assert _row_fingerprints(string_data_frame).nunique() == 2, "Different rows got the same fingerprint!"
+
+
+def test_fingerprints_are_stable():
+    data_frame = pd.DataFrame({'Duration': [20], 'Mass': ['1.2']})
+
+    assert list(_row_fingerprints(data_frame)) == list(_row_fingerprints(data_frame.copy()))
+    assert len(_row_fingerprints(data_frame)[0]) == 16
+
+
+def test_removing_duplicates_as_drop_duplicates():
+    data_frame = pd.read_csv('tests_files/Test_csv_file.csv')
+    data_frame = pd.concat([data_frame, data_frame.iloc[[0, 2]]], ignore_index=True)
+    data_frame = _wrong_data_filtering(data_frame)
+
+    expected_data_frame = data_frame.drop_duplicates()
+    deduplicated_data_frame = _removing_duplicates(data_frame.copy())
+
+    pd.testing.assert_frame_equal(deduplicated_data_frame, expected_data_frame)
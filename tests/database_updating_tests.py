@@ -0,0 +1,147 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import database_updating
+
+from contextlib import nullcontext
+from types import SimpleNamespace
+from database_updating import _fetch_existing_fingerprints, _fetch_next_index, _formatting_raw_table, \
+                              update_database, FINGERPRINTS_CHUNK_SIZE
+from data_processing import _create_clean_data_frame, compact_data_frames
+from translation_index import TranslationIndex
+from utils import DEFAULT_TRANSLATION_FILE, ROW_FINGERPRINT_COLUMN
+
+
+def _create_raw_table(engine, raw_table: pd.DataFrame) -> None:
+    with engine.begin() as conn:
+        conn.execute(f'CREATE TABLE [raw].[Test] ([index] INTEGER, [Duration] TEXT, [Mass] TEXT, '
+                     f'[{ROW_FINGERPRINT_COLUMN}] TEXT UNIQUE);')
+        for index, row in raw_table.iterrows():
+            conn.execute(f'INSERT INTO [raw].[Test] VALUES (?, ?, ?, ?);',
+                         (index, str(row['Duration']), str(row['Mass']), row[ROW_FINGERPRINT_COLUMN]))
+
+
+def test_existing_rows_dropped(engine):
+    existing_table = _formatting_raw_table(pd.DataFrame({'Duration': ['20', '30'], 'Mass': ['1.2', '1.8']}))
+    _create_raw_table(engine, existing_table)
+
+    new_table = _formatting_raw_table(pd.DataFrame({'Duration': ['30', '45'], 'Mass': ['1.8', '2.7']}))
+    existing_fingerprints = _fetch_existing_fingerprints(new_table[ROW_FINGERPRINT_COLUMN], 'Test', engine)
+    new_rows = new_table[~new_table[ROW_FINGERPRINT_COLUMN].isin(existing_fingerprints)]
+
+    assert existing_fingerprints == {existing_table[ROW_FINGERPRINT_COLUMN][1]}, "Existing row wasn't found!"
+    assert list(new_rows['Duration']) == [45.0], "Existing rows weren't dropped!"
+    assert _fetch_next_index('Test', engine) == 2
+
+
+def test_fingerprints_lookup_in_chunks(engine):
+    existing_table = _formatting_raw_table(pd.DataFrame({'Duration': ['20'], 'Mass': ['1.2']}))
+    _create_raw_table(engine, existing_table)
+
+    # More fingerprints than a single query's chunk
+    new_table = _formatting_raw_table(pd.DataFrame({'Duration': range(FINGERPRINTS_CHUNK_SIZE + 10), 'Mass': '1.2'}))
+    existing_fingerprints = _fetch_existing_fingerprints(new_table[ROW_FINGERPRINT_COLUMN], 'Test', engine)
+
+    assert existing_fingerprints == set(existing_table[ROW_FINGERPRINT_COLUMN]), "Chunked lookup missed a row!"
+
+
+def test_duplicated_rows_dropped_within_table():
+    raw_table = _formatting_raw_table(pd.DataFrame({'Duration': ['20', '20.0', '30'], 'Mass': ['1.2', '1.2', '1.8']}))
+
+    assert len(raw_table) == 2 and list(raw_table.index) == [0, 1], "Duplicated rows weren't dropped!"
+
+
+def test_numeric_cells_formatting():
+    raw_table = _formatting_raw_table(pd.DataFrame({'Duration': ['20', 0, ' 12 ', np.nan, 'abc'], 'Mass': 'np.nan'}))
+
+    assert list(raw_table['Duration'][:3]) == [20.0, 0.0, 12.0] and raw_table['Duration'][4] == 'abc'
+    assert pd.isna(raw_table['Duration'][3]) and list(raw_table['Mass']) == ['np.nan'] * 5, \
+        "Non numeric cells should be kept as they are!"
+
+
+def test_compacted_data_frame_formatting():
+    data_frame = pd.read_csv('tests_files/Test_csv_file.csv')
+    data_frame = data_frame.assign(Count=[1, 0, 3, 3, -4], Ratio=[0.5, np.nan, 1.25, 1.25, 2.0],
+                                   Label=['a', 'b', 'a', 'a', np.nan])
+    compacted_data_frame = compact_data_frames([data_frame.copy()], ['Test'])[0]
+    assert (compacted_data_frame.dtypes != object).all(), "The data frame wasn't compacted!"
+
+    raw_table = _formatting_raw_table(data_frame)
+    compacted_raw_table = _formatting_raw_table(compacted_data_frame)
+
+    # The same stored values and fingerprints, while the numeric columns stay numeric
+    pd.testing.assert_frame_equal(compacted_raw_table.astype(object), raw_table.astype(object))
+    assert pd.api.types.is_float_dtype(compacted_raw_table['Count']), "A numeric column was expanded into objects!"
+    pd.testing.assert_frame_equal(_create_clean_data_frame(compacted_raw_table), _create_clean_data_frame(raw_table))
+
+
+def _failing_clean_write_once(monkeypatch) -> None:
+    to_sql = pd.DataFrame.to_sql
+    failures = []
+
+    def failing_to_sql(self, name, con, schema=None, **kwargs):
+        if schema == 'Clean' and not failures:
+            failures.append(name)
+            raise TimeoutError('DB timeout')
+        return to_sql(self, name, con, schema=schema, **kwargs)
+
+    monkeypatch.setattr(pd.DataFrame, 'to_sql', failing_to_sql)
+
+
+def _fetch_fingerprints(engine, schema: str) -> list:
+    return list(pd.read_sql(f'SELECT * FROM [{schema}].[Test] ORDER BY [index];', engine)[ROW_FINGERPRINT_COLUMN])
+
+
+@pytest.mark.parametrize('existing_table', [False, True])
+def test_interrupted_write_is_retried(engine, monkeypatch, existing_table):
+    monkeypatch.setattr(database_updating, 'create_engine', lambda *args, **kwargs: engine)
+    if existing_table:
+        update_database([pd.DataFrame({'Duration': ['1', '2'], 'Mass': ['a', 'b']})], ['Test'])
+
+    _failing_clean_write_once(monkeypatch)
+    data_frame = pd.DataFrame({'Duration': ['3', '4'], 'Mass': ['c', 'd'], 'RMI': ['5', '6']})
+    with pytest.raises(TimeoutError):
+        update_database([data_frame.copy()], ['Test'])
+    update_database([data_frame.copy()], ['Test'])  # The retry (e.g. a resumed crawl)
+
+    raw_fingerprints = _fetch_fingerprints(engine, 'raw')
+    assert len(raw_fingerprints) == (4 if existing_table else 2)
+    assert _fetch_fingerprints(engine, 'clean') == raw_fingerprints, "The Clean table doesn't match the Raw table!"
+
+
+class _InformationSchemaConnection:
+    # Records the executed queries, and fetches the given INFORMATION_SCHEMA columns rows
+    def __init__(self, columns_rows: list) -> None:
+        self.columns_rows = columns_rows
+        self.queries = []
+
+    def execute(self, query: str):
+        self.queries.append(query)
+        return self
+
+    def fetchall(self) -> list:
+        return self.columns_rows
+
+
+def test_view_tables_created_only_for_changed_tables(tmp_path, monkeypatch):
+    (tmp_path / DEFAULT_TRANSLATION_FILE).write_text('{"Duration": "Time"}', encoding='utf-8')
+    translation_index = TranslationIndex(str(tmp_path))
+    columns_rows = [('Test_1', 'index'), ('Test_1', 'Duration'), ('Test_2', 'index'), ('Test_2', 'Mass'),
+                    ('Test_1', 'index'), ('Test_1', 'Duration'), ('V_Test_1', 'Time')]  # Raw, Clean and a view
+    conn = _InformationSchemaConnection(columns_rows)
+    monkeypatch.setattr(database_updating, 'create_engine',
+                        lambda *args, **kwargs: SimpleNamespace(begin=lambda: nullcontext(conn)))
+
+    database_updating._create_sql_view_tables(translation_index)
+    assert len(conn.queries) == 5, "Only the relevant table's views should be (re-)created, by a single columns query!"
+    assert conn.queries[-2].startswith('Create View [raw].[V_Test_1] as (Select [index], [Duration] as [Time]')
+
+    conn.queries.clear()
+    database_updating._create_sql_view_tables(translation_index)
+    assert len(conn.queries) == 1, "Unchanged tables views were re-created!"
+
+    conn.columns_rows = columns_rows + [('Test_1', 'Mass')]  # A column which was added to the table
+    conn.queries.clear()
+    database_updating._create_sql_view_tables(translation_index)
+    assert len(conn.queries) == 5 and '[Mass]' in conn.queries[-1], "Changed table's views weren't re-created!"
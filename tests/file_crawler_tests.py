@@ -0,0 +1,228 @@
+import os
+import zipfile
+import pandas as pd
+import pytest
+
+import config
+import database_updating
+import file_crawler
+
+from pytest import fixture
+from sqlalchemy import create_engine, inspect
+from file_crawler import crawl_file, plan_crawl
+from parquet_sink import read_manifest
+from utils import read_excel_sheet_names, DEFAULT_TRANSLATION_FILE, FILES_META_DATA_TABLE, ROW_FINGERPRINT_COLUMN
+
+WORKBOOK_XML = ('<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheets>'
+                '<sheet name="Sheet 1" sheetId="1"/><sheet name="Data" sheetId="2"/></sheets></workbook>')
+
+
+@fixture(scope='function')
+def root_directory(tmp_path):
+    root_path = tmp_path / 'root'
+    (root_path / 'sub_directory').mkdir(parents=True)
+    with open('tests_files/Test_csv_file.csv', 'r') as csv_file:
+        csv_content = csv_file.read()
+    for file_path in (root_path / 'Test_file_1.csv', root_path / 'Test_file_2.csv',
+                      root_path / 'sub_directory' / 'Test_file_3.csv'):
+        # A title row above the fields row (as in the crawled spreadsheets)
+        file_path.write_text(f'Test results,,,,\n{csv_content}')
+
+    return root_path
+
+
+@fixture(scope='function')
+def mapping_directory(tmp_path):
+    mapping_path = tmp_path / 'mapping'
+    mapping_path.mkdir()
+    (mapping_path / DEFAULT_TRANSLATION_FILE).write_text('{"Duration": "Time"}', encoding='utf-8')
+
+    return mapping_path
+
+
+def _using_databases(tmp_path, monkeypatch, name: str):
+    # A files cache DB and a crawl journal by a given name
+    database_path = tmp_path / f'database_{name}.db'
+    monkeypatch.setattr(config, 'connection_string', f'sqlite:///{database_path}')
+    monkeypatch.setattr(config, 'journal_path', str(tmp_path / f'crawl_journal_{name}.db'))
+
+    return database_path
+
+
+def _crawled_files(tmp_path, monkeypatch, root_directory, mapping_directory, pipelined: bool) -> set:
+    # A files cache DB and a crawl journal per crawl mode
+    database_path = _using_databases(tmp_path, monkeypatch, str(pipelined))
+
+    crawl_file(str(root_directory), str(mapping_directory), apply_data_filters=False, update_db=False,
+               pipelined=pipelined, queue_depth=1)
+
+    engine = create_engine(f'sqlite:///{database_path}', echo=False)
+    files_table = pd.read_sql(f'SELECT * FROM [{FILES_META_DATA_TABLE}];', engine)
+    engine.dispose()
+
+    return set(files_table['File_path'])
+
+
+def test_pipelined_crawl_matches_serial(tmp_path, monkeypatch, root_directory, mapping_directory):
+    serial_files = _crawled_files(tmp_path, monkeypatch, root_directory, mapping_directory, pipelined=False)
+    pipelined_files = _crawled_files(tmp_path, monkeypatch, root_directory, mapping_directory, pipelined=True)
+
+    assert len(serial_files) == 3, "Not all the files were crawled!"
+    assert pipelined_files == serial_files, "The pipelined crawl's files cache differs from the serial one!"
+
+
+@pytest.mark.parametrize('pipelined', [False, True])
+def test_crawl_writes_each_file_once(tmp_path, monkeypatch, root_directory, mapping_directory, pipelined):
+    _using_databases(tmp_path, monkeypatch, 'write')
+    calls = []
+
+    def recording_update_database(data_frame_list, file_name_list, file_path, export_directory, translate_dict):
+        calls.append(('update_database', file_path, file_name_list, data_frame_list))
+
+    monkeypatch.setattr(file_crawler, 'update_database', recording_update_database)
+    monkeypatch.setattr(file_crawler, '_create_sql_view_tables',
+                        lambda translation_index: calls.append(('_create_sql_view_tables',)))
+
+    crawl_file(str(root_directory), str(mapping_directory), apply_data_filters=False, update_db=True,
+               pipelined=pipelined, queue_depth=1)
+
+    # Every discovered file is written once (in the discovery order), and the view tables are updated after it
+    file_paths = [file_path for file_path, _ in
+                  file_crawler._discover_files(str(root_directory), file_crawler._get_extensions())]
+    assert len(file_paths) == 3
+    assert [call[:2] for call in calls] == [call for file_path in file_paths
+                                            for call in (('update_database', file_path),
+                                                         ('_create_sql_view_tables',))], \
+        "The files weren't written once each, in order!"
+
+    for _, file_path, file_name_list, data_frame_list in calls[::2]:
+        parsed_file_name_list, parsed_data_frame_list = file_crawler._parse_file(file_path, pd.read_csv, False)
+        assert file_name_list == parsed_file_name_list and len(data_frame_list) == len(parsed_data_frame_list)
+        for data_frame, parsed_data_frame in zip(data_frame_list, parsed_data_frame_list):
+            pd.testing.assert_frame_equal(data_frame, parsed_data_frame)
+
+
+def test_pipelined_crawl_stage_exception(tmp_path, monkeypatch, root_directory, mapping_directory):
+    def failing_parse_file(file_path, pandas_callback_function, apply_data_filters):
+        raise ValueError(f'Failed parsing {file_path}')
+
+    monkeypatch.setattr(file_crawler, '_parse_file', failing_parse_file)
+
+    with pytest.raises(ValueError, match='Failed parsing'):
+        _crawled_files(tmp_path, monkeypatch, root_directory, mapping_directory, pipelined=True)
+
+
+def test_crash_charges_only_the_file_in_progress(tmp_path, monkeypatch, root_directory, mapping_directory):
+    crashing_file_path = str(root_directory / 'Test_file_2.csv')
+    parse_file = file_crawler._parse_file
+
+    def crashing_parse_file(file_path, pandas_callback_function, apply_data_filters):
+        if file_path == crashing_file_path:
+            raise RuntimeError(f'Crashed parsing {file_path}')
+        return parse_file(file_path, pandas_callback_function, apply_data_filters)
+
+    monkeypatch.setattr(file_crawler, '_parse_file', crashing_parse_file)
+
+    # The other files are queued behind the crashing one (or already parsed) whenever it crashes
+    for _ in range(config.max_file_attempts):
+        with pytest.raises(RuntimeError, match='Crashed parsing'):
+            _crawled_files(tmp_path, monkeypatch, root_directory, mapping_directory, pipelined=True)
+
+    crawled_files = _crawled_files(tmp_path, monkeypatch, root_directory, mapping_directory, pipelined=True)
+
+    assert crawled_files == {str(root_directory / 'Test_file_1.csv'),
+                             str(root_directory / 'sub_directory' / 'Test_file_3.csv')}, \
+        "Only the crashing file should be quarantined!"
+
+
+@pytest.mark.parametrize('pipelined', [False, True])
+def test_crawl_resumed_after_db_write_failure(tmp_path, monkeypatch, engine, root_directory, mapping_directory,
+                                              pipelined):
+    _using_databases(tmp_path, monkeypatch, 'resume')
+    monkeypatch.setattr(database_updating, 'create_engine', lambda *args, **kwargs: engine)
+    # The view tables are created by MSSQL's INFORMATION_SCHEMA
+    monkeypatch.setattr(file_crawler, '_create_sql_view_tables', lambda translation_index: None)
+
+    # A DB timeout on the second file's Clean table write (after its Raw table was written)
+    to_sql = pd.DataFrame.to_sql
+    clean_writes = []
+
+    def failing_to_sql(self, name, con, schema=None, **kwargs):
+        if schema == 'Clean':
+            clean_writes.append(name)
+            if len(clean_writes) == 2:
+                raise TimeoutError('DB timeout')
+        return to_sql(self, name, con, schema=schema, **kwargs)
+
+    monkeypatch.setattr(pd.DataFrame, 'to_sql', failing_to_sql)
+
+    with pytest.raises(TimeoutError):
+        crawl_file(str(root_directory), str(mapping_directory), apply_data_filters=False, update_db=True,
+                   pipelined=pipelined)
+    crawl_file(str(root_directory), str(mapping_directory), apply_data_filters=False, update_db=True,
+               pipelined=pipelined)  # The resumed crawl
+
+    for table_name in ('Test_file_1', 'Test_file_2', 'Test_file_3'):
+        raw_table = pd.read_sql(f'SELECT * FROM [raw].[{table_name}] ORDER BY [index];', engine)
+        clean_table = pd.read_sql(f'SELECT * FROM [clean].[{table_name}] ORDER BY [index];', engine)
+        assert len(raw_table) == 5, f"{table_name}'s rows were written more than once (or not at all)!"
+        assert list(clean_table[ROW_FINGERPRINT_COLUMN]) == list(raw_table[ROW_FINGERPRINT_COLUMN]), \
+            f"{table_name}'s Clean table doesn't match its Raw table!"
+
+
+def test_crawl_exports_without_db(tmp_path, monkeypatch, root_directory, mapping_directory):
+    _using_databases(tmp_path, monkeypatch, 'export')
+    export_directory = tmp_path / 'export'
+
+    crawl_file(str(root_directory), str(mapping_directory), apply_data_filters=False, update_db=False,
+               export_directory=str(export_directory))
+
+    manifest = read_manifest(str(export_directory))
+    assert len(manifest) == 3, "Not all the crawled files were exported!"
+    parquet_table = pd.read_parquet(export_directory / manifest[0]['path'])
+    assert len(parquet_table) == manifest[0]['rows'] == 5
+    assert 'Time' in parquet_table.columns, "Exported columns weren't translated!"
+
+
+def test_plan_crawl(tmp_path, monkeypatch, root_directory, mapping_directory):
+    database_path = _using_databases(tmp_path, monkeypatch, 'plan')
+    file_path_1, file_path_2 = str(root_directory / 'Test_file_1.csv'), str(root_directory / 'Test_file_2.csv')
+    file_path_3 = str(root_directory / 'sub_directory' / 'Test_file_3.csv')
+
+    plan = plan_crawl(str(root_directory))
+    engine = create_engine(f'sqlite:///{database_path}', echo=False)
+    assert not inspect(engine).has_table(FILES_META_DATA_TABLE), "A crawl plan wrote to the DB!"
+    engine.dispose()
+    assert sorted(plan['new']) == sorted([file_path_1, file_path_2, file_path_3])
+    assert plan['tables'][file_path_1] == ['Test_file_1']
+    assert plan['estimated_time'] is None, "There's no recorded crawl to estimate by"
+
+    crawl_file(str(root_directory), str(mapping_directory), apply_data_filters=False)
+    with open(file_path_1, 'a') as csv_file:
+        csv_file.write('80 ,3.6 ,90 ,120 ,11\n')
+    modification_time = os.stat(file_path_1).st_mtime + 10
+    os.utime(file_path_1, (modification_time, modification_time))
+    os.remove(file_path_2)
+
+    plan = plan_crawl(str(root_directory))
+    assert plan['changed'] == [file_path_1] and plan['unchanged'] == [file_path_3] and plan['new'] == []
+    assert plan['removed'] == [file_path_2], "Removed file wasn't planned!"
+    assert plan['bytes_to_parse'] == os.path.getsize(file_path_1)
+    assert plan['estimated_time'] is not None, "Runtime wasn't estimated by the recorded crawl!"
+
+
+def test_plan_crawl_excel_sheets(tmp_path, monkeypatch):
+    _using_databases(tmp_path, monkeypatch, 'plan')
+    excel_file_path, binary_excel_file_path = str(tmp_path / 'Test_file.xltx'), str(tmp_path / 'Test_file.xlsb')
+    with zipfile.ZipFile(excel_file_path, 'w') as excel_file:
+        excel_file.writestr('xl/workbook.xml', WORKBOOK_XML)
+    with zipfile.ZipFile(binary_excel_file_path, 'w') as excel_file:  # A binary workbook has no workbook.xml
+        excel_file.writestr('xl/workbook.bin', b'')
+
+    assert read_excel_sheet_names(excel_file_path) == ['Sheet 1', 'Data']
+    assert read_excel_sheet_names(binary_excel_file_path) is None
+    assert read_excel_sheet_names('tests_files/Test_csv_file.csv') is None
+
+    # Only the workbook's index is read, the sheets themselves aren't parsed
+    plan = plan_crawl(str(tmp_path))
+    assert plan['tables'] == {excel_file_path: ['Sheet 1', 'Data'], binary_excel_file_path: None}
@@ -98,3 +98,19 @@ def test_database_doesnt_exist():
     finally:
         os.remove(test_db_not_exist_name)
 
+
+def test_read_only_doesnt_write(tmp_path):
+    with FilesCache(f'sqlite:///{tmp_path / TEST_DB_NAME}', read_only=True) as fc:
+        assert not fc.existing_table.size, "Cache suppose to be empty"
+
+    assert not inspect(fc.engine).has_table(FILES_META_DATA_TABLE), "A read-only files cache wrote to the DB!"
+
+
+def test_throughput(tmp_path):
+    with FilesCache(f'sqlite:///{tmp_path / TEST_DB_NAME}') as fc:
+        assert fc.throughput() is None, "No crawl was recorded yet"
+
+        fc.record_throughput(1000, 2.0)
+        fc.record_throughput(3000, 2.0)
+
+        assert fc.throughput() == 1000, "Throughput isn't averaged over the recorded crawls!"
@@ -0,0 +1,39 @@
+import hashlib
+import os
+
+from pytest import fixture
+from hash_prefetcher import HashPrefetcher
+from utils import calculate_md5_hash
+
+
+@fixture(scope='function')
+def files_paths(tmp_path):
+    files_paths_list = []
+    for i in range(20):
+        file_path = str(tmp_path / f'Test_file_{i}.txt')
+        with open(file_path, 'wb') as binary_file:
+            binary_file.write(os.urandom(1000 * (i + 1)))
+        files_paths_list.append(file_path)
+
+    calculate_md5_hash.cache_clear()
+    yield files_paths_list
+    calculate_md5_hash.cache_clear()
+
+
+def test_items_order_and_hashes(files_paths):
+    items = [(file_path, '.csv') for file_path in files_paths]
+    with HashPrefetcher(max_workers=3, max_bytes_in_flight=5000) as hash_prefetcher:
+        prefetched_items = list(hash_prefetcher.prefetch(items, lambda item: item[0]))
+        assert hash_prefetcher._bytes_in_flight == 0, "Bytes in flight budget wasn't released!"
+
+    assert prefetched_items == items, "Prefetching changed the items order!"
+    assert calculate_md5_hash.cache_info().currsize == len(files_paths), "md5 hashes weren't prefetched into the cache"
+    with open(files_paths[5], 'rb') as binary_file:
+        assert calculate_md5_hash(files_paths[5]) == hashlib.md5(binary_file.read()).hexdigest()
+
+
+def test_only_needed_hashes(files_paths):
+    with HashPrefetcher(max_workers=2) as hash_prefetcher:
+        list(hash_prefetcher.prefetch(files_paths, needs_hash=lambda file_path: file_path == files_paths[0]))
+
+    assert calculate_md5_hash.cache_info().currsize == 1, "Files which don't need hashing were hashed!"
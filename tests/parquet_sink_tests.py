@@ -0,0 +1,63 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import parquet_sink
+
+from parquet_sink import _add_to_parquet, _last_manifest_sequence, read_manifest
+
+pytest.importorskip('pyarrow')
+
+
+@pytest.fixture(scope='function')
+def clean_table():
+    return pd.DataFrame({'Date_Different_Language': ['2021-01-01', np.nan], 'Duration': ['20', '30']},
+                        index=pd.RangeIndex(5, 7))
+
+
+def test_partitioned_file_with_translated_columns(tmp_path, clean_table):
+    _add_to_parquet(clean_table, 'Test', r'tests_files\Test_csv_file.csv', str(tmp_path),
+                    {'Date_Different_Language': 'Date'})
+
+    entry = read_manifest(str(tmp_path))[0]
+    assert entry['path'].startswith(os.path.join('Test', 'Source_file=Test_csv_file.csv', 'Ingest_date=')), \
+        "Parquet file wasn't partitioned by source file and ingest date!"
+
+    parquet_table = pd.read_parquet(tmp_path / entry['path'])
+    assert list(parquet_table.columns) == ['index', 'Date', 'Duration'], "Columns weren't translated!"
+    assert list(parquet_table['index']) == [5, 6]
+
+
+def test_manifest_reads_only_new_files(tmp_path, clean_table):
+    _add_to_parquet(clean_table, 'Test', 'Test_csv_file.csv', str(tmp_path))
+    last_sequence = read_manifest(str(tmp_path))[-1]['sequence']
+    _add_to_parquet(clean_table, 'Test', 'Test_csv_file.csv', str(tmp_path))
+
+    new_entries = read_manifest(str(tmp_path), after_sequence=last_sequence)
+    assert len(new_entries) == 1 and new_entries[0]['sequence'] == last_sequence + 1, "Manifest returned old files!"
+
+
+def test_manifest_last_sequence(tmp_path, monkeypatch, clean_table):
+    assert _last_manifest_sequence(str(tmp_path)) == 0
+
+    monkeypatch.setattr(parquet_sink, 'MANIFEST_TAIL_BLOCK_SIZE', 16)  # Lines longer than a block
+    for _ in range(3):
+        _add_to_parquet(clean_table, 'Test', 'Test_csv_file.csv', str(tmp_path))
+
+    assert _last_manifest_sequence(str(tmp_path)) == 3
+    assert [entry['sequence'] for entry in read_manifest(str(tmp_path))] == [1, 2, 3]
+
+
+def test_crashed_write_doesnt_break_reading(tmp_path, monkeypatch, clean_table):
+    _add_to_parquet(clean_table, 'Test', 'Test_csv_file.csv', str(tmp_path))
+
+    def crashing_replace(source_path, destination_path):
+        raise OSError('Crashed before the temporary file was renamed')
+
+    monkeypatch.setattr(os, 'replace', crashing_replace)
+    with pytest.raises(OSError):
+        _add_to_parquet(clean_table, 'Test', 'Test_csv_file.csv', str(tmp_path))
+
+    assert len(pd.read_parquet(tmp_path / 'Test')) == 2, "A left behind temporary file was read!"
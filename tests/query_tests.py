@@ -0,0 +1,107 @@
+import json
+import pandas as pd
+import pytest
+
+import database_updating
+
+from pytest import fixture
+from database_updating import update_database
+from query import _build_query, read_table
+from translation_index import TranslationIndex
+from utils import DEFAULT_TRANSLATION_FILE
+
+TRANSLATE_DICT = {'Date_Different_Language': 'Date', 'House_Different_Language': 'House', 'Date_Other_Language': 'Date'}
+TABLE_COLUMNS = ['index', 'Date_Different_Language', 'House_Different_Language', 'Duration']
+
+
+def test_projection_with_translated_columns():
+    sql_query, parameters = _build_query('Test', 'clean', False, ['Date', 'Duration'], None, TRANSLATE_DICT,
+                                         TABLE_COLUMNS)
+
+    assert str(sql_query) == 'SELECT [index], [Date_Different_Language] AS [Date], [Duration] AS [Duration] ' \
+                             'FROM [clean].[Test];', "Translated columns weren't resolved!"
+    assert not parameters
+
+
+def test_view_table_columns():
+    sql_query, _ = _build_query('Test table', 'raw', True, ['House_Different_Language'], None, TRANSLATE_DICT)
+
+    assert str(sql_query) == 'SELECT [index], [House] AS [House] FROM [raw].[V_Test_table];'
+
+
+def test_filters_pushdown():
+    filters = [('Date', '>=', '2021-01-01'), ('House', 'in', ['A', 'B']), ('Duration', 'is not null', None)]
+    sql_query, parameters = _build_query('Test', 'clean', False, None, filters, TRANSLATE_DICT, TABLE_COLUMNS)
+
+    assert str(sql_query).startswith('SELECT * FROM [clean].[Test] WHERE [Date_Different_Language] >= :filter_0 AND '
+                                     '[House_Different_Language] IN '), "Filters weren't pushed down into the query!"
+    assert str(sql_query).endswith('AND [Duration] IS NOT NULL;')
+    assert parameters == {'filter_0': '2021-01-01', 'filter_1': ['A', 'B']}
+
+
+def test_unknown_schema_and_operator():
+    with pytest.raises(ValueError):
+        _build_query('Test', 'dbo', False, None, None, TRANSLATE_DICT)
+    with pytest.raises(ValueError):
+        _build_query('Test', 'clean', False, None, [('Date', '~', 1)], TRANSLATE_DICT, TABLE_COLUMNS)
+    with pytest.raises(ValueError):
+        _build_query('Test', 'clean', False, ['Building'], None, TRANSLATE_DICT, TABLE_COLUMNS)
+
+
+def test_translated_column_resolved_by_table_columns():
+    # Both 'Date_Different_Language' and 'Date_Other_Language' are translated into 'Date'
+    table_columns = ['index', 'Date_Other_Language']
+    sql_query, _ = _build_query('Test', 'clean', False, ['Date'], None, TRANSLATE_DICT, table_columns)
+
+    assert str(sql_query) == 'SELECT [index], [Date_Other_Language] AS [Date] FROM [clean].[Test];', \
+        "Translated column wasn't resolved into the table's own column!"
+
+
+def test_numeric_filters():
+    filters = [('Duration', '>', 25), ('Duration', 'in', ['20', 30.0])]
+    sql_query, parameters = _build_query('Test', 'clean', False, None, filters, TRANSLATE_DICT, TABLE_COLUMNS)
+
+    assert str(sql_query).startswith('SELECT * FROM [clean].[Test] WHERE TRY_CAST([Duration] AS FLOAT) > :filter_0 AND '
+                                     'TRY_CAST([Duration] AS FLOAT) IN '), "Numeric filters weren't numeric!"
+    assert parameters == {'filter_0': 25.0, 'filter_1': [20.0, 30.0]}
+
+
+@fixture(scope='function')
+def translation_index(tmp_path):
+    with open(tmp_path / DEFAULT_TRANSLATION_FILE, 'w', encoding='utf-8') as json_file:
+        json.dump({'Date_Different_Language': 'Date', 'Date_Other_Language': 'Date'}, json_file)
+
+    return TranslationIndex(str(tmp_path))
+
+
+@fixture(scope='function')
+def test_table_engine(engine, monkeypatch):
+    monkeypatch.setattr(database_updating, 'create_engine', lambda *args, **kwargs: engine)
+    update_database([pd.DataFrame({'Date_Other_Language': ['Jan', 'Feb', 'Mar'],
+                                   'Duration': ['20', '30', '100'],
+                                   'House': ['A', 'B', 'Name']})], ['Test'])
+
+    return engine
+
+
+def test_read_table_numeric_filters(test_table_engine, translation_index):
+    table = read_table('Test', ['Date'], [('Duration', 'in', ['20', '30'])], translation_index=translation_index,
+                       engine=test_table_engine)
+    assert list(table['Date']) == ['Jan', 'Feb'], "Numeric cells weren't matched by their values!"
+
+    # Compared as numbers ('100.0' < '25' as text)
+    table = read_table('Test', ['Duration'], [('Duration', '>', 25)], schema='raw', translation_index=translation_index,
+                       engine=test_table_engine)
+    assert list(table['Duration']) == ['30.0', '100.0']
+
+    table = read_table('Test', ['House'], [('House', '=', 'Name'), ('Date', '!=', 'Jan')],
+                       translation_index=translation_index, engine=test_table_engine)
+    assert list(table.index) == [2] and list(table['House']) == ['Name']
+
+
+def test_read_table_chunks(test_table_engine, translation_index):
+    chunks = list(read_table('Test', ['Date', 'Duration'], chunksize=2, translation_index=translation_index,
+                             engine=test_table_engine))
+
+    assert [len(chunk) for chunk in chunks] == [2, 1], "Table wasn't read in chunks!"
+    assert list(pd.concat(chunks)['Date']) == ['Jan', 'Feb', 'Mar']
@@ -0,0 +1,37 @@
+import os
+import subprocess
+import sys
+
+from typing import Dict
+
+ROOT_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ('pandas', 'numpy', 'sqlalchemy', 'dotenv')
+MAX_STARTUP_TIME = 0.5  # [sec]
+
+
+def _import_times(module_name: str) -> Dict[str, int]:
+    # Parses 'python -X importtime' output into {module name: cumulative import time (in [us])}
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module_name}'],
+                            cwd=ROOT_DIRECTORY, capture_output=True, text=True, check=True)
+    import_times: Dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative_time, imported_module = line[len('import time:'):].split('|')
+        import_times[imported_module.strip()] = int(cumulative_time)
+
+    return import_times
+
+
+def test_cli_doesnt_import_heavy_modules():
+    import_times = _import_times('main')
+    imported_heavy_modules = [module for module in HEAVY_MODULES if module in import_times]
+
+    assert not imported_heavy_modules, f"CLI startup imports heavy modules: {imported_heavy_modules}"
+
+
+def test_cli_startup_time():
+    import_times = _import_times('main')
+    startup_time = import_times['main'] / 1e6
+
+    assert startup_time < MAX_STARTUP_TIME, f"CLI startup took {startup_time:.3f} [sec]!"
@@ -0,0 +1,70 @@
+import json
+import os
+
+from pytest import fixture
+from translation_index import TranslationIndex
+from utils import DEFAULT_TRANSLATION_FILE
+
+
+@fixture(scope='function')
+def mapping_directory(tmp_path):
+    with open(tmp_path / DEFAULT_TRANSLATION_FILE, 'w', encoding='utf-8') as json_file:
+        json.dump({'Date Different\nLanguage': 'Date', 'House_Different_Language': 'House'}, json_file)
+    with open(tmp_path / 'Test_file_1.json', 'w', encoding='utf-8') as json_file:
+        json.dump({'Building_Different_Language': 'Building'}, json_file)
+
+    return tmp_path
+
+
+def test_keys_are_normalized(mapping_directory):
+    translation_index = TranslationIndex(str(mapping_directory))
+
+    assert translation_index.translate('Date_Different_Language') == 'Date', "Dictionary keys weren't normalized!"
+    assert translation_index.translate('House_Different_Language') == 'House'
+
+
+def test_file_dictionary_and_default_fallback(mapping_directory):
+    translation_index = TranslationIndex(str(mapping_directory))
+
+    assert translation_index.translate('Building_Different_Language', 'Test_file_1') == 'Building'
+    assert translation_index.translate('House_Different_Language', 'Test_csv_file') == 'House', \
+        "A file without a mapping dictionary should fall back to the default one"
+
+
+def test_relevant_table(mapping_directory):
+    translation_index = TranslationIndex(str(mapping_directory))
+
+    assert translation_index.is_relevant_table('Test_1', ['index', 'House_Different_Language'])
+    assert not translation_index.is_relevant_table('Test_2', ['index', 'Duration'])
+
+
+def test_reload_on_modification(mapping_directory):
+    translation_index = TranslationIndex(str(mapping_directory))
+    assert not translation_index.is_relevant_table('Test', ['Duration'])
+
+    default_file_path = mapping_directory / DEFAULT_TRANSLATION_FILE
+    with open(default_file_path, 'w', encoding='utf-8') as json_file:
+        json.dump({'Duration': 'Time'}, json_file)
+    modification_time = os.stat(default_file_path).st_mtime + 10
+    os.utime(default_file_path, (modification_time, modification_time))
+
+    assert translation_index.translate('Duration') is None, "Dictionary was re-loaded before a refresh"
+    translation_index.refresh()
+    assert translation_index.translate('Duration') == 'Time', "Modified dictionary wasn't re-loaded!"
+    assert translation_index.is_relevant_table('Test', ['Duration']), "Table relevance cache wasn't invalidated!"
+
+
+def test_changed_table(mapping_directory):
+    translation_index = TranslationIndex(str(mapping_directory))
+    assert translation_index.is_changed_table('Test', ['index', 'Duration'])
+    assert not translation_index.is_changed_table('Test', ['Duration', 'index']), "Unchanged table was changed!"
+
+    # A table which was re-created with the same columns count (but different columns)
+    assert translation_index.is_changed_table('Test', ['index', 'House_Different_Language'])
+
+    default_file_path = mapping_directory / DEFAULT_TRANSLATION_FILE
+    modification_time = os.stat(default_file_path).st_mtime + 10
+    os.utime(default_file_path, (modification_time, modification_time))
+    translation_index.refresh()
+    assert translation_index.is_changed_table('Test', ['index', 'House_Different_Language']), \
+        "A modified mapping dictionary didn't change the table!"
@@ -0,0 +1,106 @@
+import os
+import config
+
+from typing import Dict, List, Optional, Tuple
+from utils import read_json_translation_file, normalize_column_name, DEFAULT_TRANSLATION_FILE
+
+"""
+This module represents an index of all the translation (mapping) dictionaries in the file mapping directory. The
+directory is scanned once per crawl, each dictionary is loaded once (and re-loaded by refresh() only when its mapping
+file's modification time changes), and its keys are normalized the same way the data frames columns names are.
+Translating a column and checking whether a table is relevant for translation are then simple dictionary lookups.
+
+Functions:
+
+__init__() -- Callable within calling creating a class's attribute
+_scan() -- Scans the file mapping directory once, and maps each mapping file's name to its path
+_mapping_file_path() -- Returns the mapping file's path of a given file name (the default one if it doesn't exist)
+_load() -- Loads a mapping file's dictionary (with normalized keys), and records its modification time
+refresh() -- Re-loads the mapping files which were modified since they were loaded (called once per crawl step)
+dictionary() -- Returns the (normalized) translation dictionary of a given file name (the default one if not provided)
+translate() -- Returns the translation of a column's name (None if there isn't one)
+is_relevant_table() -- Checks whether a table is relevant for translation/mapping
+is_changed_table() -- Checks whether a table's columns (or its mapping dictionary) changed since it was last checked
+"""
+
+
+class TranslationIndex:
+    file_mapping_directory: str
+    _mapping_files: Dict[str, str]
+    _dictionaries: Dict[str, Tuple[float, Dict[str, str]]]
+    _tables_states: Dict[Tuple[str, Optional[str]], Tuple[float, frozenset]]
+    _missing_files: set
+
+    def __init__(self, file_mapping_directory: str) -> None:
+        self.file_mapping_directory = file_mapping_directory
+        self._mapping_files = self._scan()
+        self._dictionaries = {}
+        self._tables_states = {}
+        self._missing_files = set()
+
+    def _scan(self) -> Dict[str, str]:
+        mapping_files: Dict[str, str] = {}
+        if self.file_mapping_directory and os.path.isdir(self.file_mapping_directory):
+            for entry in os.scandir(self.file_mapping_directory):
+                if entry.is_file() and entry.name.lower().endswith('.json'):
+                    mapping_files[entry.name] = entry.path
+
+        return mapping_files
+
+    def _mapping_file_path(self, file_name: Optional[str] = None) -> str:
+        translate_index_file = f'{file_name}.json' if file_name else DEFAULT_TRANSLATION_FILE
+        translate_index_file_path = self._mapping_files.get(translate_index_file, None)
+        if translate_index_file_path:
+            return translate_index_file_path
+
+        if translate_index_file not in self._missing_files:  # Warning only once per mapping file
+            self._missing_files.add(translate_index_file)
+            print(f'\nWarning...\n')
+            print(f'There is no translating dictionary for {file_name or "the provided directory"}')
+            print(f'\n\nApplying the default translation dictionary!\n')
+        if file_name:
+            return self._mapping_file_path()
+
+        return self._mapping_files.get(DEFAULT_TRANSLATION_FILE, f'{config.path_mapping}\\{DEFAULT_TRANSLATION_FILE}')
+
+    def _load(self, translate_index_file_path: str) -> Dict[str, str]:
+        modification_time = os.stat(translate_index_file_path).st_mtime
+        translation_dictionary = {normalize_column_name(key): value for key, value in
+                                  read_json_translation_file(translate_index_file_path).items()}
+        self._dictionaries[translate_index_file_path] = (modification_time, translation_dictionary)
+
+        return translation_dictionary
+
+    def refresh(self) -> None:
+        # Once per crawl step - re-loading only the mapping files which were modified since they were loaded
+        for translate_index_file_path, (modification_time, _) in list(self._dictionaries.items()):
+            if os.stat(translate_index_file_path).st_mtime != modification_time:
+                self._load(translate_index_file_path)
+
+    def dictionary(self, file_name: Optional[str] = None) -> Dict[str, str]:
+        translate_index_file_path = self._mapping_file_path(file_name)
+        cached = self._dictionaries.get(translate_index_file_path, None)
+        if cached:
+            return cached[1]
+
+        return self._load(translate_index_file_path)
+
+    def translate(self, column_name: str, file_name: Optional[str] = None) -> Optional[str]:
+        return self.dictionary(file_name).get(column_name, None)
+
+    def is_relevant_table(self, table_name: str, columns_names: List[str], file_name: Optional[str] = None) -> bool:
+        translation_dictionary = self.dictionary(file_name)
+
+        return any(translation_dictionary.get(column, None) for column in columns_names)
+
+    def is_changed_table(self, table_name: str, columns_names: List[str], file_name: Optional[str] = None) -> bool:
+        # The table's view tables are up to date as long as neither its columns nor its mapping dictionary changed
+        self.dictionary(file_name)
+        modification_time = self._dictionaries[self._mapping_file_path(file_name)][0]
+
+        table_state = (modification_time, frozenset(columns_names))
+        if self._tables_states.get((table_name, file_name), None) == table_state:
+            return False
+        self._tables_states[(table_name, file_name)] = table_state
+
+        return True
@@ -2,11 +2,13 @@ import hashlib
 import json
 import os
 import pathlib
+import zipfile
 import config
 
 from datetime import datetime
 from functools import lru_cache
-from typing import Dict, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
+from xml.etree import ElementTree
 
 """
 This module is responsible for extracting file's and mapping dictionary information, as well as calculating file's md5 
@@ -17,17 +19,20 @@ Functions:
 extract_file_information() -- Extracts files relevant meta data
 merge_dictionaries() -- Merges two dictionaries
 replacing_string_char() -- Replaces a char in a given string (at a given index) with another desirable char
+normalize_column_name() -- Cleans a column's name (replaces '\\n' and ' ' with '_', and strips edge '_' chars)
+csv_table_name() -- Returns the SQL table's name of a csv file
+read_excel_sheet_names() -- Reads an Excel (Office Open XML) file's sheets names, without parsing its sheets
 calculate_md5_hash() -- Calculates files md5 in a differentiable manner (using an LRU Cache)
 read_json_translation_file() -- Given a json files path, returns a json mapping dictionary
-file_translation_dictionary_path() -- Returning the full path in which the mapping dictionary exists in (when files name
-                                      is provided)
-translation_dictionary_path() -- Returning the full path in which the default mapping dictionary exists in (when files 
-                                 name isn't provided)
 create_engine_path() -- A string builder for engine connection path
 """
 
 
 FILES_META_DATA_TABLE = 'Files_Meta_Data'
+FILES_THROUGHPUT_TABLE = 'Files_Throughput'
+ROW_FINGERPRINT_COLUMN = 'Row_fingerprint'
+DEFAULT_TRANSLATION_FILE = 'Oxford_Dictionary_Translation.json'
+MD5_CHUNK_SIZE = 2**20  # [bytes]
 
 
 def extract_file_information(file_path: str) -> Tuple[str, int, int]:
@@ -61,12 +66,56 @@ def replacing_string_char(name: str, index: int, replace_char: Optional[str] = N
     return name
 
 
+def normalize_column_name(column_name: str) -> str:
+    column_name = column_name.replace('\n', '_')
+    i = 0
+    while i < len(column_name):
+        if column_name[i] == ' ':
+            if (i != 0) and (i != len(column_name) - 1) and column_name[i+1] != '_' and column_name[i-1] != '_':
+                # Replacing character column_name[i] with '_'
+                column_name = replacing_string_char(column_name, i, '_')
+                continue
+            # Deleting column[i]
+            column_name = replacing_string_char(column_name, i, None)
+        i += 1
+
+    # If the first or last char was '\n', then delete the '_' char which it was replaced with
+    while column_name[0] == '_' or column_name[-1] == '_':
+        if column_name[0] == '_':
+            column_name = replacing_string_char(column_name, 0, None)
+            continue
+        column_name = replacing_string_char(column_name, -1, None)
+
+    return column_name
+
+
+def csv_table_name(file_path: str) -> str:
+    # The file's name only (the path might be a Windows or a POSIX one)
+    file_name_with_extension = file_path.replace('/', '\\').split('\\')[-1]
+    file_name: str = file_name_with_extension.split('.')[0]
+
+    return file_name
+
+
+def read_excel_sheet_names(file_path: str) -> Optional[List[str]]:
+    # Only the workbook's index (xl/workbook.xml) is read. None if it's not an Office Open XML file (e.g. '.xls')
+    sheet_tag = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}sheet'
+    try:
+        with zipfile.ZipFile(file_path) as excel_file:
+            workbook = ElementTree.fromstring(excel_file.read('xl/workbook.xml'))
+    except (zipfile.BadZipFile, KeyError, ElementTree.ParseError):
+        return None
+
+    return [sheet.attrib['name'] for sheet in workbook.iter(sheet_tag)]
+
+
 @lru_cache(maxsize=int(2**1e1))
 def calculate_md5_hash(file_path: str) -> str:
     md5_hash = hashlib.md5()
     with open(file_path, 'rb') as binary_file:
-        binary_file_content = binary_file.read()
-        md5_hash.update(binary_file_content)
+        # Reading in chunks, so hashing a large file doesn't hold all of its content in memory
+        for binary_file_content in iter(lambda: binary_file.read(MD5_CHUNK_SIZE), b''):
+            md5_hash.update(binary_file_content)
         file_md5_hash = md5_hash.hexdigest()
 
     return file_md5_hash
@@ -78,36 +127,6 @@ def read_json_translation_file(translate_index_file_path: str) -> Dict:
     return translation_dictionary
 
 
-def file_translation_dictionary_path(file_mapping_directory, file, file_name) -> Optional[str]:
-    translate_index_file_path = None  # Initial assignment
-    for _, _, mapping_file_List in os.walk(file_mapping_directory):
-        translate_index_file = f'{file_name}.json'
-        translate_index_file_path = os.path.join(file_mapping_directory, translate_index_file)
-        if translate_index_file not in mapping_file_List:
-            print(f'\nWarning...\n')
-            print(f'There is no translating dictionary for {file}')
-            print(f'\n\nApplying the default translation dictionary!\n')
-            translate_index_file_path = f'{config.path_mapping}\\Oxford_Dictionary_Translation.json'
-        break
-
-    return translate_index_file_path
-
-
-def translation_dictionary_path(file_mapping_directory):
-    translate_index_file_path = None  # Initial assignment
-    for _, _, mapping_file_List in os.walk(file_mapping_directory):
-        translate_index_file = 'Oxford_Dictionary_Translation.json'
-        translate_index_file_path = os.path.join(file_mapping_directory, translate_index_file)
-        if translate_index_file not in mapping_file_List:
-            print(f'\nWarning...\n')
-            print(f'There is no translating dictionary in the provided directory')
-            print(f'\n\nApplying the default translation dictionary!\n')
-            translate_index_file_path = f'{config.path_mapping}\\Oxford_Dictionary_Translation.json'
-        break
-
-    return translate_index_file_path
-
-
 def create_engine_path() -> str:
     engine_path: str = f'{config.sql_server}+{config.accessing_library}://{config.mssql_username}:{config.password}' \
                        f'@{config.server_name}:{config.server_conn_port}/{config.db_name}?driver={config.driver_name}'